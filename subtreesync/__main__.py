@@ -5,237 +5,253 @@ Git Subtree 同步工具 - 主入口
 集成添加、拉取、推送和分离功能
 """
 
+import os
 import sys
 import argparse
-from pathlib import Path
+import functools
+import importlib
+from typing import Any, Dict, List, Optional
 
-# 确保当前目录在 Python 路径中，以便能够导入模块
-SCRIPT_DIR = Path(__file__).resolve().parent
-sys.path.insert(0, str(SCRIPT_DIR))
+# 直接以脚本方式运行 (python subtreesync/__main__.py) 时，将包的上级目录加入
+# Python 路径以便导入 subtreesync；通过 -m 或安装后的入口运行时无需处理
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-try:
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.markdown import Markdown
-except ImportError:
-    print("请先安装Rich库: pip install rich")
-    print("命令: pip install rich")
-    sys.exit(1)
-
-# 创建Rich控制台对象
-console = Console()
+# 共享的Rich控制台对象，首次使用时才导入Rich并创建
+from subtreesync.console import console
 
 def print_version():
     """打印版本信息"""
     from subtreesync import __version__
-    console.print(f"SubtreeSync v{__version__}", style="bold green")
+    print(f"SubtreeSync v{__version__}")
 
-def print_help():
-    """打印帮助信息"""
-    help_text = """
+HELP_TEXT = """
 # SubtreeSync 使用帮助
 
 
 """
-    md = Markdown(help_text)
-    console.print(Panel(md, title="SubtreeSync 帮助", border_style="green"))
+
+@functools.lru_cache(maxsize=1)
+def _help_panel():
+    """构建帮助面板，Markdown 只解析一次"""
+    from rich.panel import Panel
+    from rich.markdown import Markdown
+
+    return Panel(Markdown(HELP_TEXT), title="SubtreeSync 帮助", border_style="green")
+
+def print_help():
+    """打印帮助信息"""
+    console.print(_help_panel())
+
+@functools.lru_cache(maxsize=None)
+def _get_action(module_name: str, func_name: str):
+    """按需导入操作所在模块并返回对应函数，同一会话内只查找一次"""
+    return getattr(importlib.import_module(module_name), func_name)
+
+# 交互模式下针对已配置子树的操作:
+# 模式 -> (操作名称, 模块, 单仓库处理函数, 额外参数)
+# 交互模式下逐个执行，不使用并行推送：用户可能需要在终端中输入凭据
+ACTIONS = {
+    "pull": ("拉取", "subtreesync.pull", "pull_subtree", {"interactive": True}),
+    "push": ("推送", "subtreesync.push", "push_subtree",
+             {"check_changes": True, "check_split": True, "force_split": False, "interactive": True}),
+    "split": ("分离", "subtreesync.split", "split_subtree", {"interactive": True}),
+}
+
+def _run_repo_action(mode: str, repos: List[Dict[str, Any]]) -> Optional[bool]:
+    """
+    交互模式下选择一个或多个子树并执行 pull/push/split
+    :param mode: 操作模式，ACTIONS 中的键
+    :param repos: 已配置的子树列表
+    :return: 操作是否全部成功，未选择任何仓库时返回 None
+    """
+    from subtreesync.interactive import show_operation_result, select_repos_for_action
+
+    label, module_name, func_name, template = ACTIONS[mode]
+    if not repos:
+        show_operation_result(False, label, "没有配置的子树仓库")
+        return None
+    
+    # 支持多选仓库
+    selected_repos = select_repos_for_action(repos, label)
+    if not selected_repos:
+        return None
+    
+    func = _get_action(module_name, func_name)
+    # 单个仓库时逐步确认，多个仓库时自动确认
+    yes = len(selected_repos) > 1
+    result = True
+    for repo in selected_repos:
+        console.print(f"\n[bold cyan]正在{label}:[/] {repo['name']} ({repo['prefix']})")
+        if not func(argparse.Namespace(**template, name=repo["name"], yes=yes), repo):
+            result = False
+    return result
 
 def run_interactive_mode():
     """运行交互式模式"""
-    from subtreesync.interactive import select_mode, select_repo, confirm_action, show_operation_result, select_repos_for_action, select_repository
-    from subtreesync.utils import load_subtree_repos
-    
-    # 先进行仓库选择
-    select_repository()
+    from subtreesync.interactive import select_mode, show_operation_result, select_repository
+    from subtreesync.utils import load_subtree_repos, flush_config
     
-    while True:
-        mode = select_mode()
-        if mode is None:
-            return True
+    try:
+        # 先进行仓库选择
+        select_repository()
         
-        if mode == "add":
-            from subtreesync.add import add_subtree
-            args = argparse.Namespace(remote=None, name=None, prefix=None, branch="main", 
-                                     yes=False, interactive=True)
-            result = add_subtree(args)
-        elif mode == "pull":
-            from subtreesync.pull import pull_all_subtrees, pull_subtree
-            repos = load_subtree_repos()
+        while True:
+            mode = select_mode()
+            if mode is None:
+                return True
             
-            if not repos:
-                show_operation_result(False, "拉取", "没有配置的子树仓库")
-                continue
+            if mode == "add":
+                args = argparse.Namespace(remote=None, name=None, prefix=None, branch="main", 
+                                         yes=False, interactive=True)
+                result = _get_action("subtreesync.add", "add_subtree")(args)
+            elif mode in ACTIONS:
+                repos = load_subtree_repos()
+                result = _run_repo_action(mode, repos)
+                if result is None:
+                    continue
             
-            # 支持多选仓库
-            selected_repos = select_repos_for_action(repos, "拉取")
-            if not selected_repos:
-                continue
-                
-            if len(selected_repos) == 1:
-                # 单个仓库
-                console.print(f"\n[bold cyan]正在拉取:[/] {selected_repos[0]['name']} ({selected_repos[0]['prefix']})")
-                # 使用与多个仓库相同的方式创建参数，确保一致性
-                args_dict = {"name": selected_repos[0]["name"], "yes": False, "interactive": True}
-                result = pull_subtree(argparse.Namespace(**args_dict), selected_repos[0])
+            elif mode == "remove":
+                # 添加删除子树功能的处理
+                args = argparse.Namespace(name=None, yes=False, interactive=True)
+                result = _get_action("subtreesync.remove", "remove_subtree")(args)
+                            
+            elif mode == "list":
+                args = argparse.Namespace(verbose=True, interactive=True)
+                result = _get_action("subtreesync.list", "list_subtrees")(args)
             else:
-                # 多个仓库
-                result = True
-                for repo in selected_repos:
-                    console.print(f"\n[bold cyan]正在拉取:[/] {repo['name']} ({repo['prefix']})")
-                    # 创建一个字典而不是Namespace对象，避免get()方法错误
-                    args_dict = {"name": repo["name"], "yes": True, "interactive": True}
-                    sub_result = pull_subtree(argparse.Namespace(**args_dict), repo)
-                    if not sub_result:
-                        result = False
-                        
-        elif mode == "push":
-            from subtreesync.push import push_all_subtrees, push_subtree
-            repos = load_subtree_repos()
-            
-            if not repos:
-                show_operation_result(False, "推送", "没有配置的子树仓库")
-                continue
-            
-            # 支持多选仓库
-            selected_repos = select_repos_for_action(repos, "推送")
-            if not selected_repos:
-                continue
+                show_operation_result(False, "操作", f"未知模式: {mode}")
+                result = False
             
-            if len(selected_repos) == 1:
-                # 单个仓库
-                console.print(f"\n[bold cyan]正在推送:[/] {selected_repos[0]['name']} ({selected_repos[0]['prefix']})")
-                # 使用与多个仓库相同的方式创建参数，确保一致性
-                args_dict = {
-                    "name": selected_repos[0]["name"], 
-                    "yes": False, 
-                    "check_changes": True,
-                    "check_split": True,
-                    "force_split": False,
-                    "interactive": True
-                }
-                result = push_subtree(argparse.Namespace(**args_dict), selected_repos[0])
-            else:
-                # 多个仓库
-                result = True
-                for repo in selected_repos:
-                    console.print(f"\n[bold cyan]正在推送:[/] {repo['name']} ({repo['prefix']})")
-                    # 创建一个字典而不是直接使用Namespace对象，确保所有必要的参数都存在
-                    args_dict = {
-                        "name": repo["name"], 
-                        "yes": True, 
-                        "check_changes": True,
-                        "check_split": True,
-                        "force_split": False,
-                        "interactive": True
-                    }
-                    sub_result = push_subtree(argparse.Namespace(**args_dict), repo)
-                    if not sub_result:
-                        result = False
-                        
-        elif mode == "split":
-            from subtreesync.split import split_all_subtrees, split_subtree
-            repos = load_subtree_repos()
-            
-            if not repos:
-                show_operation_result(False, "分离", "没有配置的子树仓库")
-                continue
-            
-            # 支持多选仓库
-            selected_repos = select_repos_for_action(repos, "分离")
-            if not selected_repos:
-                continue
-                
-            if len(selected_repos) == 1:
-                # 单个仓库
-                console.print(f"\n[bold cyan]正在分离:[/] {selected_repos[0]['name']} ({selected_repos[0]['prefix']})")
-                # 使用与多个仓库相同的方式创建参数，确保一致性
-                args_dict = {"name": selected_repos[0]["name"], "yes": False, "interactive": True}
-                result = split_subtree(argparse.Namespace(**args_dict), selected_repos[0])
-            else:
-                # 多个仓库
-                result = True
-                for repo in selected_repos:
-                    console.print(f"\n[bold cyan]正在分离:[/] {repo['name']} ({repo['prefix']})")
-                    # 创建一个字典而不是Namespace对象，避免get()方法错误
-                    args_dict = {"name": repo["name"], "yes": True, "interactive": True}
-                    sub_result = split_subtree(argparse.Namespace(**args_dict), repo)
-                    if not sub_result:
-                        result = False
+            # 每次操作后暂停；输入不是终端 (脚本/管道驱动) 时无需等待
+            if sys.stdin.isatty():
+                input("\n按回车继续...")
         
-        elif mode == "remove":
-            # 添加删除子树功能的处理
-            from subtreesync.remove import remove_subtree
-            args = argparse.Namespace(name=None, yes=False, interactive=True)
-            result = remove_subtree(args)
-                        
-        elif mode == "list":
-            from subtreesync.list import list_subtrees
-            args = argparse.Namespace(verbose=True, interactive=True)
-            result = list_subtrees(args)
-        else:
-            show_operation_result(False, "操作", f"未知模式: {mode}")
-            result = False
-        
-        # 每次操作后暂停
-        if input("\n按回车继续..."):
-            pass
-    
-    return True
+        return True
+    finally:
+        # 切换当前/默认仓库只记录在内存中，退出交互模式时统一写入
+        flush_config()
 
-def main():
-    """主函数"""
-    parser = argparse.ArgumentParser(description="Git Subtree 同步工具", add_help=False)
-    parser.add_argument("--version", "-v", action="store_true", help="显示版本信息")
-    parser.add_argument("--help", "-h", action="store_true", help="显示帮助信息")
-    parser.add_argument("--interactive", "-i", action="store_true", help="使用交互式菜单")
-    
-    # 子命令
-    subparsers = parser.add_subparsers(dest="command", help="子命令")
-    
-    # add 命令
-    add_parser = subparsers.add_parser("add", help="添加一个新的 Git Subtree")
+def _build_add_parser(subparsers) -> None:
+    """add 命令"""
+    add_parser = subparsers.add_parser("add", help=SUBCOMMAND_HELP["add"])
     add_parser.add_argument("--remote", help="远程仓库地址")
     add_parser.add_argument("--name", help="本地仓库名称")
     add_parser.add_argument("--prefix", help="本地目录前缀")
     add_parser.add_argument("--branch", default="main", help="分支名称，默认为 main")
     add_parser.add_argument("--yes", "-y", action="store_true", help="自动确认所有操作")
     add_parser.add_argument("--interactive", "-i", action="store_true", help="使用交互式菜单")
-    
-    # pull 命令
-    pull_parser = subparsers.add_parser("pull", help="拉取子树更新")
+
+def _build_pull_parser(subparsers) -> None:
+    """pull 命令"""
+    pull_parser = subparsers.add_parser("pull", help=SUBCOMMAND_HELP["pull"])
     pull_parser.add_argument("--name", help="仓库名称，如不指定则拉取所有")
     pull_parser.add_argument("--yes", "-y", action="store_true", help="自动确认所有操作")
+    pull_parser.add_argument("--batch", action="store_true", help="在一个 shell 中依次拉取所有仓库，遇到失败即停止")
     pull_parser.add_argument("--interactive", "-i", action="store_true", help="使用交互式菜单")
-    
-    # push 命令
-    push_parser = subparsers.add_parser("push", help="推送子树更新")
+
+def _build_push_parser(subparsers) -> None:
+    """push 命令"""
+    push_parser = subparsers.add_parser("push", help=SUBCOMMAND_HELP["push"])
     push_parser.add_argument("--name", help="仓库名称，如不指定则推送所有")
     push_parser.add_argument("--yes", "-y", action="store_true", help="自动确认所有操作")
     push_parser.add_argument("--check-changes", action="store_true", help="检查是否有更改需要推送")
-    push_parser.add_argument("--check-split", action="store_true", help="检查是否需要先执行split", default=True)
-    push_parser.add_argument("--no-check-split", action="store_false", dest="check_split", help="不检查是否需要先执行split")
+    if hasattr(argparse, "BooleanOptionalAction"):
+        # Python 3.9+: 一次注册同时生成 --check-split / --no-check-split
+        push_parser.add_argument("--check-split", action=argparse.BooleanOptionalAction, default=True,
+                                 help="检查是否需要先执行split")
+    else:
+        push_parser.add_argument("--check-split", action="store_true", help="检查是否需要先执行split", default=True)
+        push_parser.add_argument("--no-check-split", action="store_false", dest="check_split", help="不检查是否需要先执行split")
     push_parser.add_argument("--force-split", action="store_true", help="强制执行split操作")
+    push_parser.add_argument("--jobs", "-j", type=int, default=1,
+                             help="同时推送的仓库数量，默认为 1 (逐个推送，保留交互式认证)；"
+                                  "大于 1 时并行推送，不会询问凭据，需要认证的推送会直接失败")
     push_parser.add_argument("--interactive", "-i", action="store_true", help="使用交互式菜单")
-    
-    # split 命令
-    split_parser = subparsers.add_parser("split", help="分离子树为独立分支")
+
+def _build_split_parser(subparsers) -> None:
+    """split 命令"""
+    split_parser = subparsers.add_parser("split", help=SUBCOMMAND_HELP["split"])
     split_parser.add_argument("--name", help="仓库名称，如不指定则分离所有")
     split_parser.add_argument("--yes", "-y", action="store_true", help="自动确认所有操作")
     split_parser.add_argument("--interactive", "-i", action="store_true", help="使用交互式菜单")
-    
-    # remove 命令
-    remove_parser = subparsers.add_parser("remove", help="删除子树")
+
+def _build_remove_parser(subparsers) -> None:
+    """remove 命令"""
+    remove_parser = subparsers.add_parser("remove", help=SUBCOMMAND_HELP["remove"])
     remove_parser.add_argument("--name", help="要删除的仓库名称")
     remove_parser.add_argument("--yes", "-y", action="store_true", help="自动确认所有操作")
     remove_parser.add_argument("--no-files", action="store_true", help="不删除本地文件")
     remove_parser.add_argument("--batch", action="store_true", help="批量删除模式(危险)")
     remove_parser.add_argument("--interactive", "-i", action="store_true", help="使用交互式菜单")
-    
-    # list 命令
-    list_parser = subparsers.add_parser("list", help="列出所有子树")
+
+def _build_list_parser(subparsers) -> None:
+    """list 命令"""
+    list_parser = subparsers.add_parser("list", help=SUBCOMMAND_HELP["list"])
     list_parser.add_argument("--verbose", action="store_true", help="显示详细信息")
     list_parser.add_argument("--interactive", "-i", action="store_true", help="使用交互式菜单")
+
+SUBCOMMAND_HELP = {
+    "add": "添加一个新的 Git Subtree",
+    "pull": "拉取子树更新",
+    "push": "推送子树更新",
+    "split": "分离子树为独立分支",
+    "remove": "删除子树",
+    "list": "列出所有子树",
+}
+
+BUILDERS = {
+    "add": _build_add_parser,
+    "pull": _build_pull_parser,
+    "push": _build_push_parser,
+    "split": _build_split_parser,
+    "remove": _build_remove_parser,
+    "list": _build_list_parser,
+}
+
+# 命令行子命令 -> (模块, 处理函数)；remove --batch 在 main() 中单独处理
+_DISPATCH = {
+    "add": ("subtreesync.add", "add_subtree"),
+    "pull": ("subtreesync.pull", "pull_all_subtrees"),
+    "push": ("subtreesync.push", "push_all_subtrees"),
+    "split": ("subtreesync.split", "split_all_subtrees"),
+    "remove": ("subtreesync.remove", "remove_subtree"),
+    "list": ("subtreesync.list", "list_subtrees"),
+}
+
+def _find_subcommand(argv: List[str]) -> Optional[str]:
+    """返回命令行中的子命令名称 (第一个非选项参数)，没有时返回 None"""
+    for arg in argv:
+        if not arg.startswith("-"):
+            return arg
+    return None
+
+@functools.lru_cache(maxsize=None)
+def _build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    构建命令行参数解析器，同一子命令只构建一次
+    只为实际调用的子命令添加参数，其余子命令仅注册名称和说明，
+    以免每次启动都构建全部子命令的参数
+    :param command: 要执行的子命令名称
+    """
+    parser = argparse.ArgumentParser(description="Git Subtree 同步工具", add_help=False)
+    parser.add_argument("--version", "-v", action="store_true", help="显示版本信息")
+    parser.add_argument("--help", "-h", action="store_true", help="显示帮助信息")
+    parser.add_argument("--interactive", "-i", action="store_true", help="使用交互式菜单")
+    
+    # 子命令
+    subparsers = parser.add_subparsers(dest="command", help="子命令")
+    for name, builder in BUILDERS.items():
+        if name == command:
+            builder(subparsers)
+        else:
+            subparsers.add_parser(name, help=SUBCOMMAND_HELP[name])
     
+    return parser
+
+def main():
+    """主函数"""
+    parser = _build_parser(_find_subcommand(sys.argv[1:]))
     args = parser.parse_args()
     
     # 如果没有参数则进入交互模式
@@ -255,35 +271,18 @@ def main():
         args.interactive = False
     
     # 根据子命令执行不同的功能
-    if args.command == "add":
-        from subtreesync.add import add_subtree
-        result = add_subtree(args)
-    elif args.command == "pull":
-        from subtreesync.pull import pull_all_subtrees
-        result = pull_all_subtrees(args)
-    elif args.command == "push":
-        from subtreesync.push import push_all_subtrees
-        result = push_all_subtrees(args)
-    elif args.command == "split":
-        from subtreesync.split import split_all_subtrees
-        result = split_all_subtrees(args)
-    elif args.command == "remove":
-        # 处理删除命令
-        if args.batch:
-            # 批量删除模式
-            from subtreesync.remove import remove_all_subtrees
-            result = remove_all_subtrees(args)
-        else:
-            # 单个删除模式
-            from subtreesync.remove import remove_subtree
-            result = remove_subtree(args)
-    elif args.command == "list":
-        from subtreesync.list import list_subtrees
-        result = list_subtrees(args)
+    if args.command == "remove" and args.batch:
+        # 批量删除模式
+        target = ("subtreesync.remove", "remove_all_subtrees")
     else:
+        target = _DISPATCH.get(args.command)
+    
+    if target is None:
         console.print("[bold red]错误:[/] 未知命令")
         print_help()
         result = False
+    else:
+        result = _get_action(*target)(args)
     
     return result
 
@@ -15,14 +15,12 @@ try:
     from rich.prompt import Prompt, Confirm, IntPrompt
     from rich.table import Table
     from rich.syntax import Syntax
-    from rich.console import Console # Import Console
     
 except ImportError:
     print("请先安装Rich库: pip install rich")
     sys.exit(1)
     
-console = Console()
-import git # Import GitPython
+from .console import console  # 导入共享的控制台实例
 from .interactive import confirm_action
 from .utils import (
     validate_git_repo, check_working_tree,
@@ -35,7 +33,7 @@ def handle_working_tree_changes() -> bool:
     console.print("[bold yellow]警告:[/] 检测到工作区有未提交的修改")
     
     # 显示当前修改
-    success, status_output = run_command(["git", "status", "-s"])
+    success, status_output = run_command(["git", "status", "-s"], quiet=True)
     if success and status_output.strip():
         console.print(Panel(status_output.strip(), title="未提交的更改", border_style="yellow"))
     
@@ -5,13 +5,64 @@
 提供全局共享的Rich控制台实例
 """
 
+import os
 import sys
-from rich.console import Console
+import functools
+from typing import Any, Optional
 
-# 创建全局单例的Rich控制台对象
-console = Console()
+
+def plain_mode() -> bool:
+    """是否启用纯文本输出 (设置环境变量 SUBTREESYNC_PLAIN=1，适用于 CI 日志等场景)"""
+    return os.environ.get("SUBTREESYNC_PLAIN", "") not in ("", "0")
+
+def create_console() -> Any:
+    """
+    创建 Rich 控制台
+    纯文本模式下不输出任何颜色/样式控制码，也不做高亮和 emoji 替换；
+    标记仍然会被解析，以便去掉 [bold] 之类的标签
+    """
+    from rich.console import Console
+    if plain_mode():
+        return Console(color_system=None, force_terminal=False, highlight=False, emoji=False)
+    # 关闭自动高亮，省去每次 print 的正则匹配
+    return Console(highlight=False)
+
+@functools.lru_cache(maxsize=None)
+def get_console() -> Any:
+    """
+    获取进程内共享的 Rich 控制台，第一次调用时才创建
+    各模块共用同一个实例，避免重复探测终端 (Windows 上还会查询控制台模式)
+    """
+    return create_console()
+
+
+class _LazyConsole:
+    """
+    Rich 控制台的延迟代理
+    第一次访问属性时才导入 Rich 并创建 Console (会探测终端尺寸、颜色等)，
+    使 --version 之类不输出 Rich 内容的命令不必承担这部分启动开销
+    """
+
+    def __init__(self) -> None:
+        self._console: Optional[Any] = None
+
+    def _c(self) -> Any:
+        if self._console is None:
+            try:
+                self._console = get_console()
+            except ImportError:
+                print("请先安装Rich库: pip install rich")
+                sys.exit(1)
+        return self._console
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._c(), name)
+
+
+# 全局单例的Rich控制台对象
+console = _LazyConsole()
 
 def init_console():
     """初始化控制台设置（如果需要）"""
     # 此处可以添加控制台配置，如颜色主题、宽度等
-    pass
\ No newline at end of file
+    pass
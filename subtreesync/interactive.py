@@ -4,15 +4,49 @@
 交互式菜单模块，提供数字选择功能
 """
 
+import re
 from typing import List, Dict, Any, Optional, Callable, TypeVar, Union
-from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
+from rich.text import Text
 from rich.prompt import Prompt, Confirm
 
+from .console import console  # 导入共享的控制台实例
+
 T = TypeVar('T')
 
-console = Console()
+# 单个序号 / 以空白分隔的多个序号
+_NUM_RE = re.compile(r"\d+\Z")
+_NUMS_RE = re.compile(r"\d+(?:\s+\d+)*\Z")
+
+# 操作模式菜单 (显示名称与对应命令一一对应)
+MODES = ("添加子树", "拉取更新", "推送更新", "分离子树", "列出子树", "删除子树")
+MODE_CMDS = ("add", "pull", "push", "split", "list", "remove")
+MODE_OPTIONS = list(MODES) + ["退出"]
+
+# 仓库状态显示: (是否当前仓库, 是否默认仓库) -> 状态文本
+_REPO_STATUS = {
+    (False, False): "",
+    (True, False): "[green]当前[/]",
+    (False, True): " [cyan](默认)[/]",
+    (True, True): "[green]当前[/] [cyan](默认)[/]",
+}
+
+def _make_menu_table() -> Table:
+    """创建菜单表格 (序号 + 选项)，列定义固定，每次返回新的表格"""
+    table = Table(show_header=False, box=None)
+    table.add_column("序号", style="cyan", justify="right")
+    table.add_column("选项", style="green")
+    return table
+
+def _make_repo_table() -> Table:
+    """创建子树多选表格，列定义固定，每次返回新的表格"""
+    table = Table(show_header=True, box=None, border_style="dim")
+    table.add_column("序号", style="cyan bold", justify="center", width=4)
+    table.add_column("仓库名称", style="green bold")
+    table.add_column("本地目录", style="blue")
+    table.add_column("远程地址", style="magenta")
+    return table
 
 def show_menu(title: str, options: List[str]) -> int:
     """
@@ -25,12 +59,15 @@ def show_menu(title: str, options: List[str]) -> int:
     Returns:
         用户选择的索引，从0开始
     """
+    # 只有一个选项时无需让用户输入
+    if len(options) == 1:
+        console.print(f"自动选择: {options[0]}")
+        return 0
+    
     console.print(Panel(f"[bold green]{title}[/]"), style="green")
     
     # 创建菜单表格
-    table = Table(show_header=False, box=None)
-    table.add_column("序号", style="cyan", justify="right")
-    table.add_column("选项", style="green")
+    table = _make_menu_table()
     
     for i, option in enumerate(options, 1):
         table.add_row(f"{i}", option)
@@ -39,15 +76,14 @@ def show_menu(title: str, options: List[str]) -> int:
     
     # 获取用户输入
     while True:
-        choice = Prompt.ask("请输入选项对应的序号", console=console)
-        try:
-            choice_idx = int(choice) - 1
-            if 0 <= choice_idx < len(options):
-                return choice_idx
-            else:
-                console.print(f"[bold red]错误:[/] 请输入1-{len(options)}之间的数字")
-        except ValueError:
+        choice = Prompt.ask("请输入选项对应的序号", console=console).strip()
+        if not _NUM_RE.match(choice):
             console.print("[bold red]错误:[/] 请输入有效的数字")
+            continue
+        choice_idx = int(choice) - 1
+        if 0 <= choice_idx < len(options):
+            return choice_idx
+        console.print(f"[bold red]错误:[/] 请输入1-{len(options)}之间的数字")
 
 def select_from_list(title: str, items: List[T], display_func: Callable[[T], str] = str,
                      allow_cancel: bool = True) -> Optional[T]:
@@ -67,6 +103,9 @@ def select_from_list(title: str, items: List[T], display_func: Callable[[T], str
         console.print("[yellow]没有可选择的项目[/]")
         return None
     
+    if len(items) == 1 and not allow_cancel:
+        return items[0]
+    
     options = [display_func(item) for item in items]
     if allow_cancel:
         options.append("取消")
@@ -85,10 +124,12 @@ def select_repository() -> bool:
     Returns:
         是否成功选择仓库
     """
-    from subtreesync.utils import load_all_repositories, get_current_repository_name, set_current_repository
+    from subtreesync.utils import load_config, set_current_repository
     import os
     
-    repositories = load_all_repositories()
+    # 仓库列表和当前仓库名称来自同一份配置，只加载一次
+    config = load_config()
+    repositories = config.get("repositories", [])
     
     if not repositories:
         console.print("[bold yellow]警告:[/] 没有配置的仓库")
@@ -96,8 +137,9 @@ def select_repository() -> bool:
             return add_repository()
         return False
     
-    # 获取当前仓库名称
-    current_repo_name = get_current_repository_name()
+    # 获取当前仓库名称及默认仓库
+    current_repo_name = config.get("current_repository")
+    default_names = {r.get("name", "无名称") for r in repositories if r.get("is_default", False)}
     
     # 创建仓库选择表格
     table = Table(title="可用的仓库")
@@ -109,9 +151,7 @@ def select_repository() -> bool:
     for i, repo in enumerate(repositories, 1):
         name = repo.get("name", "无名称")
         path = repo.get("path", ".")
-        status = "[green]当前[/]" if name == current_repo_name else ""
-        if repo.get("is_default", False):
-            status += " [cyan](默认)[/]"
+        status = _REPO_STATUS[name == current_repo_name, name in default_names]
         
         table.add_row(f"{i}", name, path, status)
     
@@ -124,7 +164,7 @@ def select_repository() -> bool:
         repo = select_from_list("请选择要操作的仓库", repositories, lambda r: f"{r.get('name')} ({r.get('path')})")
         if repo:
             repo_path = repo.get("path", ".")
-            set_current_repository(repo.get("name"))
+            set_current_repository(repo.get("name"), defer=True)
             console.print(f"[bold green]已切换到仓库:[/] {repo.get('name')}")
             
             # 自动切换到仓库路径
@@ -151,7 +191,7 @@ def select_repository() -> bool:
             for r in config.get("repositories", []):
                 r["is_default"] = (r.get("name") == repo.get("name"))
             
-            if save_config(config):
+            if save_config(config, defer=True):
                 console.print(f"[bold green]已将 {repo.get('name')} 设为默认仓库[/]")
                 return True
     
@@ -168,7 +208,7 @@ def add_repository() -> bool:
     import os
     repo_path = Prompt.ask("请输入仓库路径", console=console, default=os.getcwd())
 
-    repo_name = repo_path.split(os.sep)[-1]  # 默认仓库名称为路径的最后一部分
+    repo_name = os.path.basename(repo_path.rstrip(os.sep))  # 默认仓库名称为路径的最后一部分
     if not repo_name.strip():
         console.print("[bold red]错误:[/] 仓库名称不能为空")
         return False
@@ -210,15 +250,12 @@ def select_mode() -> Optional[str]:
     Returns:
         选择的模式，取消则返回None
     """
-    modes = ["添加子树", "拉取更新", "推送更新", "分离子树", "列出子树","删除子树"]
-    mode_cmds = ["add", "pull", "push", "split", "list","remove"]
-    
-    choice_idx = show_menu("请选择操作模式", modes + ["退出"])
+    choice_idx = show_menu("请选择操作模式", MODE_OPTIONS)
     
-    if choice_idx == len(modes):
+    if choice_idx == len(MODES):
         return None
     
-    return mode_cmds[choice_idx]
+    return MODE_CMDS[choice_idx]
 
 def select_repo(repos: List[Dict[str, Any]], action: str) -> Optional[Dict[str, Any]]:
     """
@@ -282,23 +319,26 @@ def select_multiple_from_list(title: str, items: List[T], display_func: Callable
         console.print("[yellow]没有可选择的项目[/]")
         return []
     
+    # 只有一项时只需确认是否选择
+    if len(items) == 1:
+        item = items[0]
+        label = item['name'] if isinstance(item, dict) and 'name' in item else display_func(item)
+        console.print(Panel(f"[bold green]{title}[/]"), style="green")
+        return [item] if Confirm.ask(f"是否选择 {label}?", console=console, default=True) else []
+    
     # 显示选项列表
     console.print(Panel(f"[bold green]{title}[/]"), style="green")
     
     # 创建美化后的菜单表格
-    table = Table(show_header=True, box=None, border_style="dim")
-    table.add_column("序号", style="cyan bold", justify="center", width=4)
-    table.add_column("仓库名称", style="green bold")
-    table.add_column("本地目录", style="blue")
-    table.add_column("远程地址", style="magenta")
+    table = _make_repo_table()
     
     for i, item in enumerate(items, 1):
         if isinstance(item, dict) and 'name' in item and 'prefix' in item:
-            # 针对仓库对象进行丰富展示
-            repo_name = f"[bold]{item['name']}[/]"
-            prefix = f"[blue]{item['prefix']}[/]"
+            # 针对仓库对象进行丰富展示，直接构造 Text 对象，无需再解析标记
+            repo_name = Text(item['name'], style="bold")
+            prefix = Text(item['prefix'], style="blue")
             remote = item.get('remote', '未知')
-            remote_display = f"[dim]{remote.split('/')[-1]}[/]" if remote != '未知' else "[red]未知[/]"
+            remote_display = Text(remote.rsplit('/', 1)[-1], style="dim") if remote != '未知' else Text("未知", style="red")
             table.add_row(f"{i}", repo_name, prefix, remote_display)
         else:
             # 如果不是仓库对象，使用传入的格式化函数
@@ -319,21 +359,13 @@ def select_multiple_from_list(title: str, items: List[T], display_func: Callable
         if choice == '0':
             return items.copy()
         
-        # 否则解析数字
-        try:
-            selected_indices = []
-            for num in choice.split():
-                idx = int(num) - 1
-                if 0 <= idx < len(items):
-                    selected_indices.append(idx)
-                else:
-                    raise ValueError(f"数字 {num} 超出范围")
-            
-            # 排序并去重
-            selected_indices = sorted(set(selected_indices))
-            return [items[i] for i in selected_indices]
-        except ValueError as e:
-            console.print(f"[bold red]错误:[/] 请输入有效的数字 (1-{len(items)}) 或 '0'全选")
+        # 否则解析数字，格式和范围都合法时才返回
+        if _NUMS_RE.match(choice):
+            nums = [int(num) for num in choice.split()]
+            if min(nums) >= 1 and max(nums) <= len(items):
+                # 排序并去重
+                return [items[n - 1] for n in sorted(set(nums))]
+        console.print(f"[bold red]错误:[/] 请输入有效的数字 (1-{len(items)}) 或 '0'全选")
 
 def select_repos_for_action(repos: List[Dict[str, Any]], action: str) -> List[Dict[str, Any]]:
     """
@@ -8,7 +8,6 @@ Git Subtree 拉取更新功能
 import sys
 from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
-import git # Import GitPython
 
 try:
     from rich.panel import Panel
@@ -24,10 +23,44 @@ from .interactive import confirm_action
 from .utils import (
     run_command, # Keep if needed for non-git, otherwise remove
     validate_git_repo, check_working_tree,
-    load_subtree_repos,
-    get_repo, run_git_command_stream # Import GitPython helpers
+    load_subtree_repos, run_command_batch,
+    get_repo, run_git_command_stream, # Import GitPython helpers
+    format_command
 )
 
+def build_pull_cmd_list(repo_info: Dict[str, Any]) -> List[str]:
+    """
+    构建 git subtree pull 命令参数列表（不含开头的 git）
+    :param repo_info: 仓库配置信息
+    :return: 命令参数列表
+    """
+    name = repo_info.get("name", "")
+    prefix = repo_info.get("prefix", "")
+    branch = repo_info.get("branch", "main")
+    return ["subtree", "pull", f"--prefix={prefix}", name, branch, "--squash"]
+
+def pull_subtrees_batch(repos: List[Dict[str, Any]]) -> bool:
+    """
+    用一个 shell 脚本依次拉取多个子树，只启动一次 shell
+    任一仓库拉取失败即停止，后续仓库不会继续拉取
+    :param repos: 仓库配置列表
+    :return: 是否全部成功
+    """
+    repo = get_repo()
+    if not repo:
+        return False # Error printed by get_repo
+
+    work_dir = str(repo.working_dir)
+    cmds = [["git", "-C", work_dir] + build_pull_cmd_list(repo_info) for repo_info in repos]
+    print(f"\n批量拉取 {len(cmds)} 个仓库 (遇到失败即停止)")
+    success, _ = run_command_batch(cmds)
+    if success:
+        print("\n批量拉取成功!")
+    else:
+        print("\n批量拉取失败，失败仓库之后的仓库未执行")
+        print("提示: 如果出现冲突，请手动解决后再继续")
+    return success
+
 def pull_subtree(args=None, repo_info: Dict[str, Any] = None) -> bool:
     """
     拉取单个子树的更新 (使用 GitPython)
@@ -54,17 +87,15 @@ def pull_subtree(args=None, repo_info: Dict[str, Any] = None) -> bool:
             return False
     
     name = repo_info.get("name", "")
-    remote = repo_info.get("remote", "")
     prefix = repo_info.get("prefix", "")
-    branch = repo_info.get("branch", "main")
     
     print(f"\n从 {name} 拉取更新到 {prefix}")
 
     # 构建 git subtree pull 命令列表
-    cmd_list = ["subtree", "pull", f"--prefix={prefix}", name, branch, "--squash"]
+    cmd_list = build_pull_cmd_list(repo_info)
 
     # 显示完整命令
-    cmd_str = " ".join(['git'] + cmd_list)
+    cmd_str = format_command(['git'] + cmd_list)
     print("\n--- Git Pull 命令 ---")
     print(cmd_str)
     print("---------------------")
@@ -142,11 +173,15 @@ def pull_all_subtrees(args=None) -> bool:
             return False
     
     # 执行拉取操作
+    # 批量模式: 所有仓库在一个 shell 中依次执行，遇到失败即停止
+    if getattr(args, "batch", False) and len(selected_repos) > 1:
+        return pull_subtrees_batch(selected_repos)
+    
     success_count = 0
     fail_count = 0
     
     for repo in selected_repos:
-        if pull_subtree(repo, args):
+        if pull_subtree(args, repo):
             success_count += 1
         else:
             fail_count += 1
@@ -21,11 +21,55 @@ except ImportError:
 
 from .console import console  # 导入共享的控制台实例
 from .interactive import confirm_action
-from .utils import load_subtree_repos, find_repo_by_name, run_command
+from .utils import (
+    load_subtree_repos, find_repo_by_name, run_command, run_commands_parallel,
+    preflight_repo_state, format_command
+)
 from .split import (
-    split_subtree, run_git_command  # 复用split.py中的函数
+    split_subtree  # 复用split.py中的函数
 )
 
+def build_push_cmd_list(repo_info: Dict[str, Any]) -> List[str]:
+    """
+    构建推送 split 分支的 git push 命令参数列表（不含开头的 git）
+    :param repo_info: 仓库配置信息
+    :return: 命令参数列表
+    """
+    remote = repo_info.get("remote", "")
+    branch = repo_info.get("branch", "main")
+    split_branch = repo_info.get("split_branch")
+    return ["push", remote, f"{split_branch}:{branch}"]
+
+def push_subtrees_parallel(repos: List[Dict[str, Any]], max_workers: int = 8) -> Tuple[int, int]:
+    """
+    并行推送多个子树的 split 分支（不执行 split）
+    git push 只读取本地仓库，各仓库之间互不影响，耗时主要在网络等待上，适合并行。
+    :param repos: 仓库配置列表
+    :param max_workers: 最大并发数
+    :return: (成功数, 失败数)
+    """
+    cmds = []
+    labels = []
+    fail_count = 0
+    for repo_info in repos:
+        name = repo_info.get("name", "")
+        split_branch = repo_info.get("split_branch")
+        if not split_branch:
+            console.print(f"[bold red]错误:[/] 仓库 '{name}' 的配置中缺少 'split_branch' 定义")
+            fail_count += 1
+            continue
+        cmds.append(['git'] + build_push_cmd_list(repo_info))
+        labels.append(f"{name}: {split_branch} -> {repo_info.get('remote', '')} ({repo_info.get('branch', 'main')})")
+    
+    success_count = 0
+    if cmds:
+        console.print(f"\n[bold cyan]正在并行推送 {len(cmds)} 个仓库...[/]")
+        results = run_commands_parallel(cmds, max_workers, labels)
+        success_count = sum(1 for success, _ in results if success)
+        fail_count += len(results) - success_count
+    
+    return success_count, fail_count
+
 def push_subtree(args=None, repo_info: Dict[str, Any] = None) -> bool:
     """
     推送单个子树的更新到远程
@@ -92,10 +136,10 @@ def push_subtree(args=None, repo_info: Dict[str, Any] = None) -> bool:
     # 但更常见且推荐的是直接用 git push 推送 split 出来的分支
     
     # 使用 git push 推送 split 分支
-    cmd_list = ["push", remote, f"{split_branch}:{branch}"]
+    cmd_list = build_push_cmd_list(repo_info)
 
     # 显示完整命令
-    cmd_str = " ".join(['git'] + cmd_list)
+    cmd_str = format_command(['git'] + cmd_list)
     console.print("\n[bold yellow]--- Git Push 命令 ---[/]")
     console.print(cmd_str)
     console.print("[bold yellow]---------------------[/]")
@@ -121,15 +165,13 @@ def push_all_subtrees(args=None) -> bool:
     """
     console.print("\n[bold cyan]--- Git Subtree 推送更新工具 ---[/]")
     
-    # 检查是否在git仓库中
-    success, _ = run_git_command(["rev-parse", "--is-inside-work-tree"], False)
-    if not success:
+    # 一次 git status 同时检查是否在git仓库中以及工作区是否有未提交的更改
+    in_repo, has_changes = preflight_repo_state()
+    if not in_repo:
         console.print("[bold red]错误:[/] 当前目录不是git仓库。请在git仓库根目录下运行此脚本。")
         return False
     
-    # 检查工作区是否有未提交的更改
-    success, output = run_git_command(["status", "--porcelain"], False)
-    if success and output.strip():
+    if has_changes:
         console.print("[bold yellow]警告:[/] 检测到工作区有未提交的更改。在推送之前，请先提交这些更改。")
         console.print("[yellow]提示:[/] 使用 'git add .' 和 'git commit' 来提交更改")
         return False
@@ -184,11 +226,17 @@ def push_all_subtrees(args=None) -> bool:
     success_count = 0
     fail_count = 0
     
-    for repo in selected_repos:
-        if push_subtree(args, repo):
-            success_count += 1
-        else:
-            fail_count += 1
+    # 自动确认且无需 split 时，各仓库只执行 git push，可以并行
+    # 并行推送不会询问凭据，--jobs 不大于 1 (默认) 时逐个推送，保留终端中的交互式认证
+    jobs = getattr(args, "jobs", 1)
+    if getattr(args, "yes", False) and not getattr(args, "force_split", False) and len(selected_repos) > 1 and jobs > 1:
+        success_count, fail_count = push_subtrees_parallel(selected_repos, jobs)
+    else:
+        for repo in selected_repos:
+            if push_subtree(args, repo):
+                success_count += 1
+            else:
+                fail_count += 1
     
     # 打印操作结果摘要
     console.print("\n[bold cyan]===操作结果摘要===[/]")
@@ -7,7 +7,6 @@ Git Subtree Split功能
 
 import sys
 import os
-import subprocess
 import datetime
 import tempfile
 from typing import Dict, List, Optional, Any, Union, Tuple
@@ -21,19 +20,24 @@ except ImportError:
     print("请先安装Rich库: pip install rich")
     sys.exit(1)
 
-try:
-    import pyperclip  # 用于复制内容到剪贴板
-except ImportError:
-    pyperclip = None
-
 from .console import console  # 导入共享的控制台实例
 from .interactive import confirm_action
 from .utils import (
     validate_git_repo, check_working_tree,
     load_subtree_repos, find_repo_by_name,
-    run_git_command_stream, run_command
+    run_git_command_stream, run_command, run_git_command_direct,
+    preflight_repo_state, resolve_git_env, run_command_capture,
+    format_command
 )
 
+def _load_pyperclip():
+    """按需导入pyperclip（用于复制内容到剪贴板），未安装时返回None"""
+    try:
+        import pyperclip
+    except ImportError:
+        return None
+    return pyperclip
+
 def copy_to_clipboard(text: str) -> bool:
     """
     复制文本到剪贴板
@@ -41,6 +45,7 @@ def copy_to_clipboard(text: str) -> bool:
     :param text: 要复制的文本
     :return: 是否成功复制
     """
+    pyperclip = _load_pyperclip()
     if pyperclip is None:
         console.print("[bold yellow]警告:[/] 未安装pyperclip库，无法使用剪贴板功能")
         console.print("[dim]可以通过运行 'pip install pyperclip' 安装[/]")
@@ -64,19 +69,9 @@ def run_git_command(cmd_args: List[str], show_output: bool = False) -> Tuple[boo
     full_cmd = ["git"] + cmd_args
     
     if not show_output:
-        # 对于不需要显示输出的命令，使用简单的subprocess.run
-        try:
-            process = subprocess.run(
-                full_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            return process.returncode == 0, process.stdout + (f"\n{process.stderr}" if process.stderr else "")
-        except Exception as e:
-            return False, str(e)
+        # 对于不需要显示输出的命令，一次性捕获即可
+        success, stdout, stderr = run_command_capture(full_cmd)
+        return success, stdout + (f"\n{stderr}" if stderr else "")
     
     # 对于需要显示输出的命令，使用实时输出的方式
     return run_command(full_cmd)
@@ -90,20 +85,30 @@ def run_command_or_copy(cmd: List[str], cmd_str: str, copy_only: bool = False) -
     :param copy_only: 是否只复制不执行
     :return: (是否成功, 输出信息)
     """
+    if copy_only and copy_to_clipboard(cmd_str):
+        console.print("[bold green]命令已复制到剪贴板！[/] 您可以自行粘贴并执行")
+        return True, "命令已复制到剪贴板"
+    
     if copy_only:
-        if copy_to_clipboard(cmd_str):
-            console.print("[bold green]命令已复制到剪贴板！[/] 您可以自行粘贴并执行")
-            return True, "命令已复制到剪贴板"
-        else:
-            console.print("[bold red]复制命令到剪贴板失败[/]")
-            if not Confirm.ask("是否继续执行命令?"):
-                return False, "操作已取消"
+        console.print("[bold red]复制命令到剪贴板失败[/]")
+        if not Confirm.ask("是否继续执行命令?"):
+            return False, "操作已取消"
     
     # 执行命令 - 使用新的直接执行方法
-    from .utils import run_git_command_direct
     success = run_git_command_direct(cmd, True)
     return success, "" # 不再返回输出内容
 
+def build_split_cmd_list(repo_info: Dict[str, Any]) -> List[str]:
+    """
+    构建 git subtree split 命令参数列表（不含开头的 git），使用固定的 split_branch
+    
+    :param repo_info: 仓库配置信息
+    :return: 命令参数列表
+    """
+    prefix = repo_info.get("prefix", "")
+    split_branch = repo_info.get("split_branch")
+    return ["subtree", "split", f"--prefix={prefix}", f"--branch={split_branch}", "--rejoin"]
+
 def split_subtree(args=None, repo_info: Dict[str, Any] = None) -> bool:
     """
     为单个子树执行split操作，分离成独立分支
@@ -137,10 +142,10 @@ def split_subtree(args=None, repo_info: Dict[str, Any] = None) -> bool:
     console.print(f"\n[bold cyan]正在为 {prefix} 执行 split 操作，目标分支: {split_branch}[/]")
     
     # 构建 git subtree split 命令列表，使用固定的 split_branch
-    cmd_list = ["subtree", "split", f"--prefix={prefix}", f"--branch={split_branch}", "--rejoin"]
+    cmd_list = build_split_cmd_list(repo_info)
     
     # 显示完整命令
-    cmd_str = " ".join(['git'] + cmd_list)
+    cmd_str = format_command(['git'] + cmd_list)
     console.print("\n[bold yellow]--- Git Split 命令 ---[/]")
     console.print(cmd_str)
     console.print("[bold yellow]------------------------[/]")
@@ -169,19 +174,20 @@ def split_all_subtrees(args=None) -> bool:
     """
     console.print("\n[bold cyan]--- Git Subtree Split 工具 ---[/]")
     
-    # 检查是否在git仓库中
-    success, _ = run_git_command(["rev-parse", "--is-inside-work-tree"], False)
-    if not success:
+    # 一次调用同时检查是否在git仓库中以及工作区是否有未提交的更改
+    in_repo, has_changes = preflight_repo_state()
+    if not in_repo:
         console.print("[bold red]错误:[/] 当前目录不是git仓库。请在git仓库根目录下运行此脚本。")
         return False
     
-    # 检查工作区是否有未提交的更改
-    success, output = run_git_command(["status", "--porcelain"], False)
-    if success and output.strip():
+    if has_changes:
         console.print("[bold yellow]警告:[/] 检测到工作区有未提交的更改。在执行split之前，请先提交这些更改。")
         console.print("[yellow]提示:[/] 使用 'git add .' 和 'git commit' 来提交更改")
         return False
     
+    # 解析一次仓库根目录，后续每个 split 命令直接复用
+    resolve_git_env()
+    
     # 加载所有仓库配置
     repos = load_subtree_repos()
     
@@ -226,7 +232,7 @@ def split_all_subtrees(args=None) -> bool:
     
     # 检查是否只复制命令
     copy_only = getattr(args, "copy_only", False) if args else False
-    if copy_only and not pyperclip:
+    if copy_only and _load_pyperclip() is None:
         console.print("[bold yellow]警告:[/] 复制到剪贴板功能需要pyperclip库，但未安装")
         console.print("[yellow]提示:[/] 可以通过运行 'pip install pyperclip' 安装")
         if Confirm.ask("是否继续并直接执行命令?"):
@@ -239,33 +245,32 @@ def split_all_subtrees(args=None) -> bool:
     success_count = 0
     fail_count = 0
     
-    for repo in selected_repos:
-        # 如果是批量模式且需要复制到剪贴板，我们只复制第一个命令
-        if copy_only and len(selected_repos) > 1:
-            if success_count == 0:
-                console.print("[bold yellow]由于选择了多个仓库且启用了复制模式，只有第一个命令会被复制到剪贴板[/]")
+    script_lines = []
+    
+    if copy_only:
+        # 复制模式：所有仓库的命令拼成一个脚本，一次性复制到剪贴板
+        for repo in selected_repos:
+            if not repo.get("split_branch"):
+                console.print(f"[bold red]错误:[/] 仓库 '{repo.get('name', '')}' 的配置中缺少 'split_branch' 定义")
+                fail_count += 1
+                continue
+            script_lines.append(format_command(['git'] + build_split_cmd_list(repo)))
         
-        # 传递copy_only参数到split_subtree函数
-        if copy_only:
-            # 创建临时参数对象，带有copy_only和name属性
-            class TempArgs:
-                pass
-            temp_args = TempArgs()
-            temp_args.copy_only = True
-            temp_args.name = repo.get("name", "")
-            temp_args.yes = True
+        if script_lines:
+            all_cmds = "\n".join(script_lines)
+            # 同时输出到终端，剪贴板不可用时也可以直接从这里复制
+            console.print("\n[bold yellow]--- Git Split 命令 ---[/]")
+            print(all_cmds)
+            console.print("[bold yellow]------------------------[/]")
             
-            if split_subtree(temp_args, repo):
-                success_count += 1
+            if copy_to_clipboard(all_cmds):
+                console.print("[bold green]命令已复制到剪贴板！[/] 您可以自行粘贴并执行")
+                success_count = len(script_lines)
             else:
-                fail_count += 1
-            
-            # 复制后只处理第一个仓库
-            if len(selected_repos) > 1:
-                console.print("[bold yellow]由于您选择了复制模式，其余仓库命令需要手动生成[/]")
-                break
-        else:
-            # 正常执行
+                console.print("[bold red]复制命令到剪贴板失败[/]，请直接复制上面输出的命令")
+                fail_count += len(script_lines)
+    else:
+        for repo in selected_repos:
             if split_subtree(args, repo):
                 success_count += 1
             else:
@@ -274,7 +279,7 @@ def split_all_subtrees(args=None) -> bool:
     # 打印操作结果摘要
     console.print("\n[bold cyan]===操作结果摘要===[/]")
     if copy_only:
-        console.print(f"• 总共生成命令: {success_count} 个仓库")
+        console.print(f"• 总共生成命令: {len(script_lines)} 个仓库")
         console.print(f"• 成功复制到剪贴板: {success_count} 个命令")
     else:
         console.print(f"• 总共尝试split: {len(selected_repos)} 个仓库")
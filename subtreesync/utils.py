@@ -6,35 +6,100 @@
 
 import os
 import sys
+import shlex
 import json
+import stat
+import select
+import selectors
 import subprocess
-import io # Import io module
-import git # Import GitPython
+import tempfile
+import threading
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Tuple, Union
-from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple, Union, Final, TYPE_CHECKING
 
 try:
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.progress import Progress, SpinnerColumn, TextColumn
-    from rich.syntax import Syntax
+    import orjson  # 可选依赖，用于加速配置文件的序列化
 except ImportError:
-    print("请先安装Rich库: pip install rich")
-    sys.exit(1)
+    orjson = None
 
-# 创建Rich控制台对象
-console = Console()
+from .console import console  # 导入共享的控制台实例
+
+if TYPE_CHECKING:
+    import git
+
+# 已解析配置的缓存: ((mtime_ns, size), 配置, 名称索引)，名称索引见 _build_config_index
+_CONFIG_CACHE: Optional[Tuple[Tuple[int, int], Dict[str, Any], Dict[str, Any]]] = None
+
+# 延迟写入的配置及其名称索引 (交互模式下的修改，由 flush_config() 统一写入)
+_PENDING_CONFIG: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None
+
+# 配置的版本号，_load_config_shared 返回的配置对象每次更换时加一
+_CONFIG_GENERATION = 0
+
+# 当前仓库子树配置的缓存: (配置版本号, {"list": 子树列表, "by_name": 名称->子树})
+_REPOS_CACHE: Optional[Tuple[int, Dict[str, Any]]] = None
+
+# 配置文件位于脚本所在目录，运行期间不会变化，导入时解析一次即可
+_CONFIG_DIR: Final[Path] = Path(__file__).resolve().parent
+_CONFIG_PATH: Final[Path] = _CONFIG_DIR / "subtree_repos.json"
 
 def get_config_dir() -> Path:
     """获取配置文件目录"""
-    # 获取脚本所在的目录
-    script_dir = Path(__file__).resolve().parent
-    return script_dir
+    return _CONFIG_DIR
 
 def get_config_path() -> Path:
     """获取配置文件路径"""
-    return get_config_dir() / "subtree_repos.json"
+    return _CONFIG_PATH
+
+def _dump_config(config: Dict[str, Any]) -> bytes:
+    """将配置序列化为 UTF-8 字节，安装了 orjson 时优先使用"""
+    if orjson is not None:
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    return json.dumps(config, ensure_ascii=False, indent=2).encode('utf-8')
+
+def _load_config_bytes(data: bytes) -> Any:
+    """
+    解析配置文件的原始字节，安装了 orjson 时优先使用 (直接解析字节，省去解码步骤)
+    标准库 json 同样直接解析字节；Windows 编辑器可能写入 UTF-8 BOM，先去掉再解析
+    """
+    if data.startswith(b"\xef\xbb\xbf"):
+        data = data[3:]
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _write_config_file(config: Dict[str, Any]) -> None:
+    """
+    原子地写入配置文件：先整体序列化，再一次写入同目录的临时文件并 fsync，
+    最后用 os.replace 替换，避免中途崩溃留下半截的 JSON
+    """
+    payload = _dump_config(config)
+    # NamedTemporaryFile 以 0600 创建文件，替换前改为原文件的权限 (新文件则按 umask 取默认权限)
+    try:
+        mode = stat.S_IMODE(os.stat(get_config_path()).st_mode)
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+    f = tempfile.NamedTemporaryFile(
+        dir=get_config_dir(), prefix=".subtree_repos.", suffix=".tmp", delete=False
+    )
+    try:
+        with f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(f.name, mode)
+        os.replace(f.name, get_config_path())
+    except BaseException:
+        # 写入或替换失败时删除临时文件，避免在配置目录中残留 .tmp 文件
+        try:
+            os.unlink(f.name)
+        except OSError:
+            pass
+        raise
 
 def ensure_config_exists():
     """确保配置文件存在"""
@@ -42,49 +107,137 @@ def ensure_config_exists():
     if not config_path.exists():
         config_path.parent.mkdir(parents=True, exist_ok=True)
         # 初始化多仓库配置结构
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump({"repositories": [], "current_repository": None}, f, ensure_ascii=False, indent=2)
+        _write_config_file({"repositories": [], "current_repository": None})
+
+def _config_file_key() -> Optional[Tuple[int, int]]:
+    """配置文件的 (mtime_ns, size)，用于判断缓存是否仍然有效"""
+    try:
+        st = os.stat(get_config_path())
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def _copy_json(obj: Any) -> Any:
+    """复制由 JSON 解析得到的数据 (只含 dict/list 和不可变的标量)，比 copy.deepcopy 快"""
+    if isinstance(obj, dict):
+        return {k: _copy_json(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_copy_json(v) for v in obj]
+    return obj
+
+def _build_config_index(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    为配置建立名称索引，避免每次查找都线性扫描
+    :return: {"repos": 仓库名称 -> 在 repositories 中的下标,
+              "subs": 与 repositories 一一对应的 子树名称 -> 在该仓库 repos 中的下标}
+              名称重复时以第一个为准，与原先线性查找的结果一致
+    """
+    repos_index: Dict[Any, int] = {}
+    subs_index: List[Dict[Any, int]] = []
+    for i, repo in enumerate(config.get("repositories", [])):
+        repos_index.setdefault(repo.get("name"), i)
+        subs: Dict[Any, int] = {}
+        for j, sub in enumerate(repo.get("repos", [])):
+            subs.setdefault(sub.get("name"), j)
+        subs_index.append(subs)
+    return {"repos": repos_index, "subs": subs_index}
 
 def load_config() -> Dict[str, Any]:
-    """加载配置文件"""
-    ensure_config_exists()
+    """
+    加载配置文件
+    配置文件未变化时复用上次解析的结果；返回的是副本，调用方可以随意修改
+    """
+    return _copy_json(_load_config_shared()[0])
+
+def _load_config_shared() -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    加载配置及其名称索引，返回的是缓存中的对象本身，调用方不能修改
+    :return: (配置, 名称索引)
+    """
+    global _CONFIG_CACHE, _CONFIG_GENERATION
+    # 有尚未写入的修改时以内存中的配置为准
+    if _PENDING_CONFIG is not None:
+        return _PENDING_CONFIG
+    # 先取文件标识再读取，读取期间若文件被改写，下次调用会因标识不同而重新加载
+    key = _config_file_key()
+    if key is None:
+        ensure_config_exists()
+        key = _config_file_key()
+    elif _CONFIG_CACHE is not None and _CONFIG_CACHE[0] == key:
+        return _CONFIG_CACHE[1], _CONFIG_CACHE[2]
     try:
-        with open(get_config_path(), 'r', encoding='utf-8') as f:
-            config = json.load(f)
-            # 确保新的配置格式存在
-            if "repositories" not in config:
-                # 兼容旧格式，创建新格式
-                if "repos" in config:
-                    # 将旧格式转换为新格式
-                    config = {
-                        "repositories": [
-                            {
-                                "name": "Default",
-                                "path": ".",
-                                "is_default": True,
-                                "repos": config.get("repos", [])
-                            }
-                        ],
-                        "current_repository": "Default"
-                    }
-                else:
-                    # 创建空的新格式
-                    config = {"repositories": [], "current_repository": None}
-            return config
+        config = _load_config_bytes(get_config_path().read_bytes())
+        # 确保新的配置格式存在
+        if "repositories" not in config:
+            # 兼容旧格式，创建新格式
+            if "repos" in config:
+                # 将旧格式转换为新格式
+                config = {
+                    "repositories": [
+                        {
+                            "name": "Default",
+                            "path": ".",
+                            "is_default": True,
+                            "repos": config.get("repos", [])
+                        }
+                    ],
+                    "current_repository": "Default"
+                }
+            else:
+                # 创建空的新格式
+                config = {"repositories": [], "current_repository": None}
+        index = _build_config_index(config)
+        if key is not None:
+            _CONFIG_CACHE = (key, config, index)
+        _CONFIG_GENERATION += 1
+        return config, index
     except Exception as e:
         console.print(f"[bold red]读取配置文件失败:[/] {str(e)}")
-        return {"repositories": [], "current_repository": None}
+        config = {"repositories": [], "current_repository": None}
+        _CONFIG_GENERATION += 1
+        return config, _build_config_index(config)
 
-def save_config(config: Dict[str, Any]) -> bool:
-    """保存配置文件"""
+def save_config(config: Dict[str, Any], defer: bool = False) -> bool:
+    """
+    保存配置文件
+    :param config: 完整配置
+    :param defer: 只记录在内存中，稍后由 flush_config() 统一写入 (交互模式下减少写盘次数)
+    :return: 是否成功
+    """
+    global _CONFIG_CACHE, _PENDING_CONFIG, _CONFIG_GENERATION
+    if defer:
+        pending = _copy_json(config)
+        _PENDING_CONFIG = (pending, _build_config_index(pending))
+        _CONFIG_GENERATION += 1
+        return True
     try:
-        with open(get_config_path(), 'w', encoding='utf-8') as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        _write_config_file(config)
+        # 直接用刚写入的内容更新缓存，下次读取无需重新解析文件
+        key = _config_file_key()
+        if key is not None:
+            cached = _copy_json(config)
+            _CONFIG_CACHE = (key, cached, _build_config_index(cached))
+        else:
+            _CONFIG_CACHE = None
+        _PENDING_CONFIG = None
+        _CONFIG_GENERATION += 1
         return True
     except Exception as e:
         console.print(f"[bold red]保存配置文件失败:[/] {str(e)}")
         return False
 
+def _invalidate_config_cache() -> None:
+    """丢弃所有已缓存的配置，下次读取时重新解析文件 (供测试或外部修改配置后使用)"""
+    global _CONFIG_CACHE, _REPOS_CACHE
+    _CONFIG_CACHE = None
+    _REPOS_CACHE = None
+
+def flush_config() -> bool:
+    """将延迟保存的配置写入文件，没有待写入的修改时直接返回"""
+    if _PENDING_CONFIG is None:
+        return True
+    return save_config(_PENDING_CONFIG[0])
+
 def load_all_repositories() -> List[Dict[str, Any]]:
     """加载所有仓库配置"""
     config = load_config()
@@ -103,33 +256,64 @@ def get_default_repository() -> Optional[Dict[str, Any]]:
             return repo
     return repositories[0] if repositories else None
 
-def get_current_repository() -> Optional[Dict[str, Any]]:
-    """获取当前选中的仓库配置"""
-    current_name = get_current_repository_name()
-    if not current_name:
-        return get_default_repository()
-        
-    repositories = load_all_repositories()
-    for repo in repositories:
-        if repo.get("name") == current_name:
-            return repo
+def _current_repository_index(config: Dict[str, Any], index: Dict[str, Any]) -> Optional[int]:
+    """当前选中仓库在 repositories 中的下标；未设置或不存在时取默认仓库，没有任何仓库时返回 None"""
+    current_name = config.get("current_repository")
+    if current_name and current_name in index["repos"]:
+        return index["repos"][current_name]
     
     # 如果当前仓库不存在，返回默认仓库
-    return get_default_repository()
+    repositories = config.get("repositories", [])
+    for i, repo in enumerate(repositories):
+        if repo.get("is_default", False):
+            return i
+    return 0 if repositories else None
 
-def set_current_repository(name: str) -> bool:
-    """设置当前选中的仓库"""
+def get_current_repository() -> Optional[Dict[str, Any]]:
+    """获取当前选中的仓库配置"""
+    config, index = _load_config_shared()
+    i = _current_repository_index(config, index)
+    if i is None:
+        return None
+    return _copy_json(config["repositories"][i])
+
+def set_current_repository(name: str, defer: bool = False) -> bool:
+    """
+    设置当前选中的仓库
+    :param name: 仓库名称
+    :param defer: 延迟写入，见 save_config
+    """
     config = load_config()
     config["current_repository"] = name
-    return save_config(config)
+    return save_config(config, defer)
 
-def load_subtree_repos() -> List[Dict[str, Any]]:
-    """加载当前仓库的子树配置"""
-    repo = get_current_repository()
-    if not repo:
+def _load_repos_cache() -> Dict[str, Any]:
+    """
+    加载当前仓库的子树列表及名称索引（配置未变化时直接返回缓存）
+    返回的是缓存中的对象本身，调用方不能修改
+    """
+    global _REPOS_CACHE
+    # 先检查配置是否有变化 (文件被改写或保存、延迟保存都会更新版本号)，再比较版本号
+    config, index = _load_config_shared()
+    if _REPOS_CACHE is not None and _REPOS_CACHE[0] == _CONFIG_GENERATION:
+        return _REPOS_CACHE[1]
+
+    i = _current_repository_index(config, index)
+    if i is None:
         console.print("[bold yellow]警告:[/] 未设置当前仓库或无仓库配置")
-        return []
-    return repo.get("repos", [])
+        return {"list": [], "by_name": {}}
+    repos = config["repositories"][i].get("repos", [])
+    # 名称重复时以第一个为准，与 _build_config_index 及原先的线性查找一致
+    by_name: Dict[Any, Dict[str, Any]] = {}
+    for r in repos:
+        by_name.setdefault(r.get("name"), r)
+    entry = {"list": repos, "by_name": by_name}
+    _REPOS_CACHE = (_CONFIG_GENERATION, entry)
+    return entry
+
+def load_subtree_repos() -> List[Dict[str, Any]]:
+    """加载当前仓库的子树配置；返回的是副本，调用方可以随意修改"""
+    return _copy_json(_load_repos_cache()["list"])
 
 def find_repo_by_name(name: str) -> Optional[Dict[str, Any]]:
     """
@@ -139,13 +323,10 @@ def find_repo_by_name(name: str) -> Optional[Dict[str, Any]]:
         name: 仓库名称
         
     Returns:
-        找到的仓库配置，未找到则返回None
+        找到的仓库配置 (副本，调用方可以随意修改)，未找到则返回None
     """
-    repos = load_subtree_repos()
-    for repo in repos:
-        if repo.get("name") == name:
-            return repo
-    return None
+    repo = _load_repos_cache()["by_name"].get(name)
+    return _copy_json(repo) if repo is not None else None
 
 def delete_subtree_repo(name: str) -> bool:
     """
@@ -157,81 +338,61 @@ def delete_subtree_repo(name: str) -> bool:
     Returns:
         是否成功删除
     """
-    current_repo = get_current_repository()
-    if not current_repo:
+    shared, index = _load_config_shared()
+    i = _current_repository_index(shared, index)
+    if i is None:
         console.print("[bold red]错误:[/] 未设置当前仓库")
         return False
     
-    repos = current_repo.get("repos", [])
-    initial_count = len(repos)
-    
-    # 过滤掉要删除的仓库
-    repos = [repo for repo in repos if repo.get("name") != name]
-    
-    if len(repos) == initial_count:
+    if name not in index["subs"][i]:
         # 没有找到要删除的仓库
         return False
     
-    # 更新当前仓库的子树列表
-    current_repo["repos"] = repos
-    
-    # 更新整体配置
-    config = load_config()
-    for i, repo in enumerate(config.get("repositories", [])):
-        if repo.get("name") == current_repo.get("name"):
-            config["repositories"][i] = current_repo
-            break
+    # 过滤掉要删除的仓库，并更新整体配置
+    config = _copy_json(shared)
+    current_repo = config["repositories"][i]
+    current_repo["repos"] = [repo for repo in current_repo.get("repos", []) if repo.get("name") != name]
     
     return save_config(config)
 
 def save_subtree_repo(repo_info: Dict[str, str]) -> bool:
     """保存subtree仓库配置到当前选中的仓库中"""
-    current_repo = get_current_repository()
-    if not current_repo:
+    shared, index = _load_config_shared()
+    i = _current_repository_index(shared, index)
+    if i is None:
         console.print("[bold red]错误:[/] 未设置当前仓库")
         return False
     
-    repos = current_repo.get("repos", [])
-    
     # 检查是否已存在
-    for i, repo in enumerate(repos):
-        if repo.get("name") == repo_info["name"]:
-            # 更新已存在的配置
-            repos[i] = repo_info
-            break
+    j = index["subs"][i].get(repo_info["name"])
+    
+    # 更新当前仓库的子树列表及整体配置
+    config = _copy_json(shared)
+    repos = config["repositories"][i].setdefault("repos", [])
+    if j is not None:
+        # 更新已存在的配置
+        repos[j] = repo_info
     else:
         # 添加新配置
         repos.append(repo_info)
     
-    # 更新当前仓库的子树列表
-    current_repo["repos"] = repos
-    
-    # 更新整体配置
-    config = load_config()
-    for i, repo in enumerate(config.get("repositories", [])):
-        if repo.get("name") == current_repo.get("name"):
-            config["repositories"][i] = current_repo
-            break
-    
     return save_config(config)
 
 def add_repository(repo_info: Dict[str, Any]) -> bool:
     """添加或更新仓库配置"""
-    config = load_config()
-    repositories = config.get("repositories", [])
+    shared, index = _load_config_shared()
+    config = _copy_json(shared)
+    repositories = config.setdefault("repositories", [])
     
     # 检查是否已存在
-    for i, repo in enumerate(repositories):
-        if repo.get("name") == repo_info["name"]:
-            # 更新已存在的配置
-            repositories[i] = repo_info
-            break
+    i = index["repos"].get(repo_info["name"])
+    if i is not None:
+        # 更新已存在的配置
+        repositories[i] = repo_info
     else:
         # 添加新配置
         repositories.append(repo_info)
     
-    config["repositories"] = repositories
-    
     # 如果只有一个仓库，设为默认和当前仓库
     if len(repositories) == 1:
         repositories[0]["is_default"] = True
@@ -239,78 +400,239 @@ def add_repository(repo_info: Dict[str, Any]) -> bool:
     
     return save_config(config)
 
-def run_command(cmd: List[str], show_command: bool = True) -> Tuple[bool, str]:
+# 读取子进程输出时每次读取的字节数
+_READ_CHUNK_SIZE = 65536
+
+# 预先解析的 GIT_DIR / GIT_WORK_TREE，传给后续 git 子进程，免去每次向上查找仓库根目录
+_GIT_ENV: Dict[str, str] = {}
+_GIT_ENV_CWD: Optional[str] = None
+
+def resolve_git_env() -> bool:
+    """
+    用一次 git rev-parse 解析当前仓库的工作区根目录和 .git 目录，
+    之后本进程在同一工作目录下启动的命令都会通过环境变量复用该结果
+    :return: 是否解析成功
+    """
+    global _GIT_ENV, _GIT_ENV_CWD
+    cwd = os.getcwd()
+    if _GIT_ENV_CWD == cwd:
+        return bool(_GIT_ENV)
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--show-toplevel", "--absolute-git-dir"],
+            capture_output=True,
+            text=True,
+            encoding='utf-8',
+            errors='replace'
+        )
+    except FileNotFoundError:
+        return False
+
+    lines = result.stdout.splitlines()
+    if result.returncode == 0 and len(lines) >= 2:
+        _GIT_ENV = {"GIT_WORK_TREE": lines[0], "GIT_DIR": lines[1]}
+    else:
+        _GIT_ENV = {}
+    _GIT_ENV_CWD = cwd
+    return bool(_GIT_ENV)
+
+def _git_env() -> Optional[Dict[str, str]]:
+    """子进程使用的环境变量；未解析或工作目录已切换时返回 None，即继承当前环境"""
+    if not _GIT_ENV or _GIT_ENV_CWD != os.getcwd():
+        return None
+    return {**os.environ, **_GIT_ENV}
+
+def _write_raw(stream, data: bytes) -> None:
+    """将原始字节直接写入终端流并立即刷新，流没有字节缓冲区时退回文本写入"""
+    buffer = getattr(stream, "buffer", None)
+    if buffer is not None:
+        buffer.write(data)
+        buffer.flush()
+    else:
+        stream.write(data.decode('utf-8', errors='replace'))
+        stream.flush()
+
+def _stream_pipe(pipe, target) -> bytes:
+    """
+    按块读取管道中的原始字节并实时转发到终端流，读到 EOF 后一次性拼接返回
+    :param pipe: 子进程的输出管道
+    :param target: 转发目标 (sys.stdout / sys.stderr)
+    :return: 读取到的全部字节
+    """
+    chunks: List[bytes] = []
+    fd = pipe.fileno()
+    while True:
+        chunk = os.read(fd, _READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        # 原样写入终端，不经过 rich 和逐行解码
+        _write_raw(target, chunk)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def _pump_output(process: subprocess.Popen) -> Tuple[bytes, bytes]:
+    """
+    同时转发子进程的 stdout 和 stderr，避免一侧管道写满时子进程被阻塞。
+    POSIX 上用 selectors 多路复用；Windows 的管道不支持 select，改用线程读取 stderr
+    :param process: 以 stdout=PIPE, stderr=PIPE 启动的子进程
+    :return: (stdout 全部字节, stderr 全部字节)
+    """
+    if os.name == "nt":
+        stderr_result: List[bytes] = []
+        reader = threading.Thread(
+            target=lambda: stderr_result.append(_stream_pipe(process.stderr, sys.stderr)),
+            daemon=True
+        )
+        reader.start()
+        stdout_bytes = _stream_pipe(process.stdout, sys.stdout)
+        reader.join()
+        return stdout_bytes, stderr_result[0] if stderr_result else b""
+
+    chunks: Dict[Any, List[bytes]] = {process.stdout: [], process.stderr: []}
+    targets = {process.stdout: sys.stdout, process.stderr: sys.stderr}
+    with selectors.DefaultSelector() as selector:
+        for pipe in chunks:
+            selector.register(pipe, selectors.EVENT_READ)
+        while selector.get_map():
+            for key, _ in selector.select():
+                chunk = os.read(key.fd, _READ_CHUNK_SIZE)
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    continue
+                _write_raw(targets[key.fileobj], chunk)
+                chunks[key.fileobj].append(chunk)
+    return b"".join(chunks[process.stdout]), b"".join(chunks[process.stderr])
+
+def _wait_for_exit(process: subprocess.Popen, timeout: float) -> int:
+    """
+    带超时等待子进程退出。Linux (Python 3.9+) 上用 pidfd 事件等待，
+    其它平台退回 Popen.wait (其超时等待内部是睡眠轮询)
+    """
+    pidfd_open = getattr(os, "pidfd_open", None)
+    if pidfd_open is not None:
+        try:
+            pidfd = pidfd_open(process.pid)
+        except OSError:
+            pidfd = None
+        if pidfd is not None:
+            try:
+                ready, _, _ = select.select([pidfd], [], [], timeout)
+            finally:
+                os.close(pidfd)
+            if not ready:
+                raise subprocess.TimeoutExpired(process.args, timeout)
+    return process.wait(timeout=timeout)
+
+def run_command_capture(cmd: List[str], cwd: Optional[str] = None) -> Tuple[bool, str, str]:
+    """
+    执行一次性的短命令并捕获全部输出，不做实时显示
+    :param cmd: 命令列表
+    :param cwd: 执行目录，默认为当前目录
+    :return: (成功标志, 标准输出, 错误输出)
+    """
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            cwd=cwd,
+            # 指定了其它目录时不能沿用当前目录解析出的 GIT_DIR
+            env=_git_env() if cwd is None else None,
+            check=False
+        )
+    except FileNotFoundError:
+        return False, "", f"错误: 命令或程序 '{cmd[0]}' 未找到。请确保它在系统PATH中。"
+    return (
+        result.returncode == 0,
+        result.stdout.decode('utf-8', errors='replace'),
+        result.stderr.decode('utf-8', errors='replace')
+    )
+
+def format_command(cmd: List[str]) -> str:
+    """
+    把命令列表拼成可以直接复制到本平台 shell 中执行的字符串
+    Windows 上按 cmd.exe 的规则加双引号 (cmd 不会去掉 POSIX 风格的单引号)，其它平台按 sh 的规则加引号
+    """
+    if os.name == "nt":
+        return subprocess.list2cmdline(cmd)
+    return shlex.join(cmd)
+
+def _echo_command(cmd: List[str]) -> None:
+    """显示即将执行的命令；输出不是终端 (如 CI、重定向) 时直接 print，省去 Rich 的标记解析"""
+    cmd_str = format_command(cmd)
+    if sys.stdout.isatty():
+        console.print(f"[dim]$ {cmd_str}[/]")
+    else:
+        print(f"$ {cmd_str}")
+
+def _terminate_process(process: subprocess.Popen) -> None:
+    """尽量结束仍在运行的子进程：先 terminate，0.5 秒内未退出则 kill"""
+    if process.poll() is not None:
+        return
+    try:
+        process.terminate()
+        _wait_for_exit(process, 0.5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+    except Exception:
+        pass
+
+def run_command(cmd: List[str], show_command: bool = True, quiet: bool = False) -> Tuple[bool, str]:
     """
     执行命令并实时输出结果，强制UTF-8解码，绕过rich打印。
     :param cmd: 命令列表
     :param show_command: 是否显示执行的命令
+    :param quiet: 静默模式，只捕获输出不实时显示（适用于 git status 等短命令）
     :return: (成功标志, 完整输出结果)
     """
-    if show_command:
-        # Still use console.print for the command itself for nice formatting
-        cmd_str = " ".join(cmd)
-        console.print(f"[dim]$ {cmd_str}[/]")
+    if quiet:
+        if show_command:
+            _echo_command(cmd)
+        # 短命令无需逐行转发，一次性捕获即可
+        success, stdout, stderr = run_command_capture(cmd)
+        return success, (stdout + stderr).rstrip()
 
-    full_stdout = ""
-    full_stderr = ""
-    process = None
+    return _popen_stream(cmd, None, show_command)
+
+def _popen_stream(cmd: List[str], cwd: Optional[str] = None, show_command: bool = True) -> Tuple[bool, str]:
+    """
+    执行命令并实时转发 stdout/stderr，结束后返回完整输出 (run_command 与 run_git_command_stream 共用)
+    :param cmd: 命令列表
+    :param cwd: 工作目录，None 表示当前目录
+    :param show_command: 是否显示执行的命令
+    :return: (成功标志, 完整输出结果)
+    """
+    if show_command:
+        _echo_command(cmd)
 
     try:
-        # 使用 Popen 获取字节流
-        process = subprocess.Popen(
+        # 使用 Popen 获取字节流；with 退出时会关闭管道并等待进程结束
+        with subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
+            cwd=cwd,
+            # 解析出的 GIT_DIR 等环境变量只对应当前目录
+            env=_git_env() if cwd is None else None,
+            bufsize=-1, # 使用系统默认缓冲大小
             universal_newlines=False # 确保 stdout/stderr 是字节流
-        )
+        ) as process:
+            try:
+                # --- 同时实时转发 stdout 和 stderr，结束后统一解码 ---
+                stdout_bytes, stderr_bytes = _pump_output(process)
+            except BaseException:
+                # 被中断 (Ctrl+C) 或转发出错时才需要主动结束子进程
+                _terminate_process(process)
+                raise
 
-        # --- 实时处理 stdout ---
-        if process.stdout:
-            stdout_reader = io.BufferedReader(process.stdout)
-            while True:
-                line_bytes = stdout_reader.readline()
-                if not line_bytes:
-                    break
-                try:
-                    # 解码为 UTF-8，替换错误
-                    line_str = line_bytes.decode('utf-8', errors='replace')
-                    # 直接写入 sys.stdout，不经过 rich
-                    sys.stdout.write(line_str)
-                    sys.stdout.flush() # 确保立即显示
-                    full_stdout += line_str
-                except Exception as e:
-                    # 如果写入或解码失败，打印错误到 stderr
-                    error_msg = f"\n[Error processing stdout line: {e}] Raw bytes: {line_bytes!r}\n"
-                    sys.stderr.write(error_msg)
-                    sys.stderr.flush()
-            process.stdout.close()
-
-        # --- 处理 stderr ---
-        stderr_str = ""
-        if process.stderr:
-            stderr_bytes = process.stderr.read()
-            if stderr_bytes:
-                try:
-                    stderr_str = stderr_bytes.decode('utf-8', errors='replace')
-                    if stderr_str:
-                        # 直接写入 sys.stderr
-                        sys.stderr.write(stderr_str)
-                        sys.stderr.flush() # 确保立即显示
-                        full_stderr += stderr_str
-                except Exception as e:
-                    error_msg = f"\n[Error processing stderr: {e}] Raw stderr bytes: {stderr_bytes!r}\n"
-                    sys.stderr.write(error_msg)
-                    sys.stderr.flush()
-            process.stderr.close()
-
-        # --- 等待进程结束 ---
-        process.wait()
         return_code = process.returncode
+        full_stdout = stdout_bytes.decode('utf-8', errors='replace')
+        full_stderr = stderr_bytes.decode('utf-8', errors='replace')
 
         # 合并完整输出
         output = full_stdout + full_stderr
 
-        return return_code == 0, output.strip() # strip() might remove necessary newlines if output is multi-line
+        # 只去掉末尾的换行/空白：行首缩进 (如 git status -s 的 " M") 有意义，且已无末尾空白时 rstrip 不会复制字符串
+        return return_code == 0, output.rstrip()
 
     except FileNotFoundError:
         error_msg = f"错误: 命令或程序 '{cmd[0]}' 未找到。请确保它在系统PATH中。"
@@ -320,18 +642,146 @@ def run_command(cmd: List[str], show_command: bool = True) -> Tuple[bool, str]:
     except Exception as e:
         error_msg = f"命令执行时发生意外错误: {str(e)}"
         console.print(f"[bold red]{error_msg}[/]")
-        if process and process.stdout: process.stdout.close()
-        if process and process.stderr: process.stderr.close()
         return False, error_msg
+
+def _cmd_script_line(cmd: List[str]) -> str:
+    """
+    把命令转成 .cmd 脚本中的一行，执行结果与直接传参列表给 subprocess 相同
+    list2cmdline 只处理程序自身的参数解析，cmd 还会展开 %VAR% 并解释引号外的 ^ & | < > ( )，
+    因此 % 一律写成 %%，引号外的元字符前加 ^ (cmd 遇到每个 " 都会切换引号状态)
+    """
+    out = []
+    in_quotes = False
+    for ch in subprocess.list2cmdline(cmd):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == "%":
+            ch = "%%"
+        elif not in_quotes and ch in "^&|<>()":
+            ch = "^" + ch
+        out.append(ch)
+    return "".join(out)
+
+def run_command_batch(cmds: List[List[str]], show_command: bool = True) -> Tuple[bool, str]:
+    """
+    将多个命令写入一个临时脚本，只启动一个 shell 依次执行并实时输出结果。
+    任一命令失败即停止执行后续命令，因此不再区分单个命令的成败。
+    :param cmds: 命令列表
+    :param show_command: 是否显示执行的命令
+    :return: (全部成功标志, 完整输出结果)
+    """
+    if os.name == "nt":
+        # 关闭延迟展开，避免参数中的 ! 被当作变量引用
+        lines = ["@echo off", "setlocal DisableDelayedExpansion"]
+        # 脚本以 UTF-8 写入，而 cmd 按当前代码页解析批处理文件 (逐行读取)，
+        # 先记下原代码页并切换到 65001，否则中文路径等非 ASCII 参数会被解析错；结束时恢复原代码页
+        # chcp 的输出因语言而异 (如 "活动代码页: 936"、"Aktive Codepage: 850.")，取最后一个词并去掉句点
+        lines += [
+            "for /f \"delims=\" %%a in ('chcp') do for %%c in (%%a) do set \"_subtreesync_cp=%%c\"",
+            "if defined _subtreesync_cp set \"_subtreesync_cp=%_subtreesync_cp:.=%\"",
+            "chcp 65001 >nul",
+        ]
+        lines += [f"{_cmd_script_line(cmd)} || goto :fail" for cmd in cmds]
+        lines += [
+            "set \"_subtreesync_rc=0\"",
+            "goto :done",
+            ":fail",
+            "set \"_subtreesync_rc=1\"",
+            ":done",
+            "if defined _subtreesync_cp chcp %_subtreesync_cp% >nul",
+            "exit /b %_subtreesync_rc%",
+        ]
+        suffix = ".cmd"
+    else:
+        lines = ["set -e"]
+        lines += [shlex.join(cmd) for cmd in cmds]
+        suffix = ".sh"
+
+    if show_command:
+        for cmd in cmds:
+            _echo_command(cmd)
+
+    fd, script_path = tempfile.mkstemp(prefix="subtreesync_batch_", suffix=suffix, text=True)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        shell_cmd = ["cmd", "/c", script_path] if os.name == "nt" else ["sh", script_path]
+        return run_command(shell_cmd, show_command=False)
     finally:
-        if process and process.poll() is None:
-            try:
-                process.terminate()
-                process.wait(timeout=0.5)
-            except subprocess.TimeoutExpired:
-                process.kill()
-            except Exception:
-                pass
+        try:
+            os.unlink(script_path)
+        except OSError:
+            pass
+
+def _noninteractive_env() -> Dict[str, str]:
+    """
+    并行执行时子进程使用的环境变量：多个子进程共用一个终端，不能向用户询问凭据，
+    因此禁止 git/凭据管理器/ssh 交互，需要认证的命令会立即失败并给出错误信息
+    """
+    env = dict(_git_env() or os.environ)
+    env["GIT_TERMINAL_PROMPT"] = "0"
+    env["GCM_INTERACTIVE"] = "never"
+    # GIT_SSH_COMMAND 优先于 GIT_SSH，用户只设置了 GIT_SSH 时不覆盖
+    if "GIT_SSH_COMMAND" in env or "GIT_SSH" not in env:
+        env["GIT_SSH_COMMAND"] = env.get("GIT_SSH_COMMAND", "ssh") + " -o BatchMode=yes"
+    return env
+
+def run_commands_parallel(cmds: List[List[str]], max_workers: int = 8,
+                          labels: Optional[List[str]] = None) -> List[Tuple[bool, str]]:
+    """
+    并行执行多个互不依赖的命令，适用于以网络等待为主的操作 (如推送到多个远程)。
+    每个命令的输出先完整捕获，完成时再整体打印，多个命令的输出不会交错。
+    子进程不会询问凭据 (见 _noninteractive_env)；按 Ctrl+C 会取消尚未开始的命令并结束正在运行的命令。
+    :param cmds: 命令列表
+    :param max_workers: 最大并发数
+    :param labels: 每个命令在输出中显示的名称，默认为命令本身
+    :return: 与 cmds 顺序一致的 (成功标志, 完整输出结果) 列表
+    """
+    if labels is None:
+        labels = [format_command(cmd) for cmd in cmds]
+    results: List[Tuple[bool, str]] = [(False, "")] * len(cmds)
+    env = _noninteractive_env()
+    running: List[subprocess.Popen] = []
+    stopping = threading.Event()
+
+    def run_one(cmd: List[str]) -> Tuple[bool, str, str]:
+        try:
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env) as process:
+                running.append(process)
+                # 中断发生在进程启动之后、登记之前时，由这里负责结束
+                if stopping.is_set():
+                    _terminate_process(process)
+                stdout, stderr = process.communicate()
+        except FileNotFoundError:
+            return False, "", f"错误: 命令或程序 '{cmd[0]}' 未找到。请确保它在系统PATH中。"
+        return (
+            process.returncode == 0,
+            stdout.decode('utf-8', errors='replace'),
+            stderr.decode('utf-8', errors='replace')
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(cmds)))) as executor:
+        futures = {executor.submit(run_one, cmd): i for i, cmd in enumerate(cmds)}
+        try:
+            # 结果只在当前线程按完成顺序打印，无需额外加锁
+            for future in as_completed(futures):
+                i = futures[future]
+                success, stdout, stderr = future.result()
+                output = (stdout + stderr).rstrip()
+                results[i] = (success, output)
+                status = "[bold green]✓[/]" if success else "[bold red]✗[/]"
+                console.print(f"{status} {labels[i]}")
+                if output:
+                    print(output)
+        except KeyboardInterrupt:
+            stopping.set()
+            for future in futures:
+                future.cancel()
+            for process in list(running):
+                _terminate_process(process)
+            console.print("[bold yellow]已中断，剩余的命令已取消[/]")
+            raise
+    return results
 
 def run_command_direct(cmd: List[str], show_command: bool = True) -> bool:
     """
@@ -343,8 +793,7 @@ def run_command_direct(cmd: List[str], show_command: bool = True) -> bool:
     :return: 命令是否成功执行
     """
     if show_command:
-        cmd_str = " ".join(cmd)
-        console.print(f"[dim]$ {cmd_str}[/]")
+        _echo_command(cmd)
         
     try:
         # 直接使用subprocess.run，不捕获输出，让它显示在终端上
@@ -353,6 +802,7 @@ def run_command_direct(cmd: List[str], show_command: bool = True) -> bool:
             # 不使用stdout=subprocess.PIPE和stderr=subprocess.PIPE
             # 这样输出会直接显示在终端上
             check=False,  # 不抛出异常，而是通过返回码判断成功与否
+            env=_git_env(),
             text=True,    # 文本模式
             encoding='utf-8',
             errors='replace'
@@ -382,141 +832,87 @@ def run_git_command_direct(cmd_args: List[str], show_command: bool = True) -> bo
 
 # --- GitPython Integration ---
 
-_repo_cache = None
-
-def get_repo() -> Optional[git.Repo]:
-    """获取当前目录的 GitPython Repo 对象，带缓存"""
-    global _repo_cache
-    if (_repo_cache):
-        return _repo_cache
+# Repo 对象缓存: 工作目录 -> Repo，None 表示该目录不在 Git 仓库中 (否定结果同样缓存，避免重复向上查找)
+_repo_cache: Dict[str, Optional["git.Repo"]] = {}
+_git_module = None
+
+def _git():
+    """延迟导入 GitPython 并缓存模块引用，只有真正需要时才付出初始化开销"""
+    global _git_module
+    if _git_module is None:
+        import git as _git_module_ref
+        _git_module = _git_module_ref
+    return _git_module
+
+def get_repo() -> Optional["git.Repo"]:
+    """获取当前目录的 GitPython Repo 对象，按工作目录缓存"""
+    key = os.getcwd()
+    if key in _repo_cache:
+        repo = _repo_cache[key]
+        if repo is None:
+            print("错误: 当前目录或其父目录不是有效的 Git 仓库。")
+        return repo
+    git = _git()
     try:
         repo = git.Repo(search_parent_directories=True)
-        _repo_cache = repo
+        _repo_cache[key] = repo
         return repo
     except git.InvalidGitRepositoryError:
+        _repo_cache[key] = None
         print("错误: 当前目录或其父目录不是有效的 Git 仓库。")
         return None
     except Exception as e:
         print(f"初始化 Git 仓库对象时出错: {e}")
         return None
 
-def run_git_command_stream(repo: git.Repo, command_list: List[str], show_command: bool = True) -> Tuple[bool, str]:
+def run_git_command_stream(repo: "git.Repo", command_list: List[str], show_command: bool = True) -> Tuple[bool, str]:
     """
-    使用 subprocess.Popen 执行 Git 命令并实时流式输出结果, 在正确的仓库目录执行。
+    在仓库工作目录下执行 Git 命令并实时流式输出结果。
+    直接调用 git 可执行文件，与 run_command 共用同一套流式输出实现。
     :param repo: GitPython Repo 对象 (用于获取工作目录)
     :param command_list: Git 子命令列表 (例如 ['subtree', 'pull', ...])
     :param show_command: 是否显示执行的命令
     :return: (成功标志, 完整输出结果)
     """
-    # Prepend 'git' to the command list for execution
-    full_cmd = ['git'] + command_list
-    if show_command:
-        cmd_str = " ".join(full_cmd)
-        # Use print for simplicity here, as console might be problematic
-        print(f"$ {cmd_str}")
-
-    full_stdout = ""
-    full_stderr = ""
-    process = None
-
-    try:
-        # Use subprocess.Popen directly, setting the working directory
-        process = subprocess.Popen(
-            full_cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=repo.working_dir, # Execute in the repository's working directory
-            universal_newlines=False # Ensure bytes
-        )
-
-        # --- 实时处理 stdout (与 run_command 逻辑相同) ---
-        if process.stdout:
-            stdout_reader = io.BufferedReader(process.stdout)
-            while True:
-                line_bytes = stdout_reader.readline()
-                if not line_bytes:
-                    break
-                try:
-                    line_str = line_bytes.decode('utf-8', errors='replace')
-                    sys.stdout.write(line_str)
-                    sys.stdout.flush()
-                    full_stdout += line_str
-                except Exception as e:
-                    error_msg = f"\n[Error processing stdout line: {e}] Raw bytes: {line_bytes!r}\n"
-                    sys.stderr.write(error_msg)
-                    sys.stderr.flush()
-            process.stdout.close()
-
-        # --- 处理 stderr (与 run_command 逻辑相同) ---
-        stderr_str = ""
-        if process.stderr:
-            stderr_bytes = process.stderr.read()
-            if stderr_bytes:
-                try:
-                    stderr_str = stderr_bytes.decode('utf-8', errors='replace')
-                    if stderr_str:
-                        sys.stderr.write(stderr_str)
-                        sys.stderr.flush()
-                        full_stderr += stderr_str
-                except Exception as e:
-                    error_msg = f"\n[Error processing stderr: {e}] Raw stderr bytes: {stderr_bytes!r}\n"
-                    sys.stderr.write(error_msg)
-                    sys.stderr.flush()
-            process.stderr.close()
-
-        # --- 等待进程结束 ---
-        return_code = process.wait() # Wait for process completion
+    return _popen_stream(['git'] + command_list, str(repo.working_dir), show_command)
 
-        output = full_stdout + full_stderr
-        return return_code == 0, output.strip()
-
-    # Keep GitCommandError for potential future use if switching back
-    except git.GitCommandError as e:
-        print(f"Git 命令执行失败: {e.command}")
-        print(f"返回码: {e.status}")
-        stderr_output = e.stderr.decode('utf-8', errors='replace') if isinstance(e.stderr, bytes) else str(e.stderr)
-        print(f"错误输出:\n{stderr_output}")
-        return False, stderr_output
-    except FileNotFoundError:
-        # This error now correctly refers to 'git' if it's not found
-        error_msg = f"错误: 命令或程序 '{full_cmd[0]}' 未找到。请确保 Git 已安装并在系统 PATH 中。"
-        print(error_msg) # Use print
-        return False, error_msg
-    except Exception as e:
-        error_msg = f"执行 Git 命令时发生意外错误: {str(e)}"
-        print(error_msg) # Use print
-        if process and process.stdout: process.stdout.close()
-        if process and process.stderr: process.stderr.close()
-        return False, error_msg
-    finally:
-        # Ensure process termination (same as run_command)
-        if process and process.poll() is None:
-            try:
-                process.terminate()
-                process.wait(timeout=0.5)
-            except subprocess.TimeoutExpired:
-                process.kill()
-            except Exception:
-                pass
+@functools.lru_cache(maxsize=4)
+def _is_git_repo(cwd: str) -> bool:
+    """检查指定目录是否在git仓库中，结果按目录缓存"""
+    success, _, _ = run_command_capture(["git", "rev-parse", "--is-inside-work-tree"], cwd=cwd)
+    return success
 
 def validate_git_repo() -> bool:
-    """检查当前是否在git仓库中 (使用 GitPython)"""
-    return get_repo() is not None
+    """检查当前是否在git仓库中 (每个工作目录只检查一次)"""
+    return _is_git_repo(os.getcwd())
 
 def check_working_tree() -> bool:
-    """检查工作区状态，返回是否有未提交的更改 (使用 GitPython)"""
-    repo = get_repo()
-    if not repo:
-        return False # Not a repo, treat as no changes for safety? Or raise error?
-    try:
-        # is_dirty(untracked_files=True) checks for modified, added, deleted, and untracked files
-        return repo.is_dirty(untracked_files=True)
-    except Exception as e:
-        print(f"检查工作区状态时出错: {e}")
+    """检查工作区状态，返回是否有未提交的更改"""
+    # --porcelain 会列出已修改、已暂存、已删除及未跟踪的文件
+    success, stdout, stderr = run_command_capture(["git", "status", "--porcelain"])
+    if not success:
+        print(f"检查工作区状态时出错: {stderr.strip()}")
         return True # Assume dirty on error
+    return bool(stdout.strip())
+
+def preflight_repo_state() -> Tuple[bool, bool]:
+    """
+    用一次 git status 调用同时检查是否在git仓库中以及工作区是否有未提交的更改
+    :return: (是否在git仓库中, 是否有未提交的更改)
+    """
+    success, stdout, _ = run_command_capture(["git", "status", "--porcelain=v2", "--branch"])
+    if not success:
+        return False, False
 
+    lines = stdout.splitlines()
+    # "# branch.*" 为头信息，其余非空行均表示有改动
+    in_repo = any(line.startswith("# branch.head") for line in lines)
+    has_changes = any(line and not line.startswith("#") for line in lines)
+    return in_repo, has_changes
+
+@functools.lru_cache(maxsize=256)
 def extract_repo_name(url: str) -> str:
-    """从仓库URL中提取项目名"""
+    """从仓库URL中提取项目名 (纯函数，结果按URL缓存)"""
     # 处理以下格式:
     # https://github.com/username/repo.git
     # git@github.com:username/repo.git
@@ -524,32 +920,23 @@ def extract_repo_name(url: str) -> str:
     if url.endswith('.git'):
         url = url[:-4]
     
-    if ":" in url:  # SSH格式
-        parts = url.split(":")[-1].split("/")
-    else:  # HTTP(S)格式
-        parts = url.split("/")
-    
-    if parts:
-        return parts[-1]
-    
-    return ""
+    # 先取最后一个冒号之后的部分 (SSH格式)，再取最后一个路径分量
+    return url.rpartition(":")[2].rpartition("/")[2]
 
 def list_git_remotes() -> List[Dict[str, str]]:
-    """获取当前git仓库的所有远程仓库 (使用 GitPython)"""
-    repo = get_repo()
-    if not repo:
+    """获取当前git仓库的所有远程仓库"""
+    success, stdout, stderr = run_command_capture(["git", "remote", "-v"])
+    if not success:
+        print(f"列出 Git 远程仓库时出错: {stderr.strip()}")
         return []
-    try:
-        remotes_info = []
-        for remote in repo.remotes:
-            # Assuming fetch URL is representative, could also check push URL
-            url = next(remote.urls, None) # Get first URL
-            if url:
-                remotes_info.append({
-                    "name": remote.name,
-                    "url": url
-                })
-        return remotes_info
-    except Exception as e:
-        print(f"列出 Git 远程仓库时出错: {e}")
-        return []
\ No newline at end of file
+    remotes_info = []
+    for line in stdout.splitlines():
+        # 每行格式: <name>\t<url> (fetch|push)，以 fetch 地址为准
+        name, _, rest = line.partition("\t")
+        url, _, kind = rest.rpartition(" ")
+        if kind == "(fetch)" and url:
+            remotes_info.append({
+                "name": name,
+                "url": url
+            })
+    return remotes_info
\ No newline at end of file
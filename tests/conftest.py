@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+pytest 公共配置
+"""
+
+import json
+
+import pytest
+
+from subtreesync import utils
+
+# test_git_rich.py 是需要手动运行并交互选择命令的脚本，不由 pytest 收集
+collect_ignore = ["test_git_rich.py"]
+
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    """把配置文件指向临时目录，并清空模块级的配置缓存"""
+    path = tmp_path / "subtree_repos.json"
+    monkeypatch.setattr(utils, "get_config_dir", lambda: tmp_path)
+    monkeypatch.setattr(utils, "get_config_path", lambda: path)
+    monkeypatch.setattr(utils, "_CONFIG_CACHE", None)
+    monkeypatch.setattr(utils, "_PENDING_CONFIG", None)
+    monkeypatch.setattr(utils, "_REPOS_CACHE", None)
+    return path
+
+
+@pytest.fixture
+def write_config(config_path):
+    """直接写入配置文件 (模拟外部修改)，返回写入的配置"""
+    def write(config):
+        config_path.write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+        return config
+    return write
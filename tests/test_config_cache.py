@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+配置缓存测试
+"""
+
+import os
+
+import pytest
+
+from subtreesync import utils
+
+
+def _config(*sub_names):
+    return {
+        "repositories": [
+            {"name": "Main", "path": ".", "is_default": True,
+             "repos": [{"name": n, "prefix": n} for n in sub_names]}
+        ],
+        "current_repository": "Main",
+    }
+
+
+@pytest.fixture
+def parse_count(monkeypatch):
+    """统计配置文件被解析的次数"""
+    count = [0]
+    original = utils._load_config_bytes
+
+    def counting(data):
+        count[0] += 1
+        return original(data)
+
+    monkeypatch.setattr(utils, "_load_config_bytes", counting)
+    return count
+
+
+def test_save_then_load_uses_cache(config_path, parse_count):
+    """保存后再读取，直接使用刚保存的内容，不重新解析文件"""
+    config = _config("a", "b")
+    assert utils.save_config(config)
+    assert utils.load_config() == config
+    assert [r["name"] for r in utils.load_subtree_repos()] == ["a", "b"]
+    assert parse_count[0] == 0
+
+
+def test_load_returns_copy(config_path, write_config):
+    """load_config 返回副本，修改后不影响缓存"""
+    write_config(_config("a"))
+    utils.load_config()["repositories"].clear()
+    assert utils.load_config() == _config("a")
+
+
+def test_external_rewrite_is_picked_up(config_path, write_config, parse_count):
+    """文件被外部改写 (修改时间或大小变化) 后重新加载"""
+    write_config(_config("a"))
+    assert utils.find_repo_by_name("a") is not None
+    first = parse_count[0]
+
+    write_config(_config("a", "bb"))
+    assert utils.find_repo_by_name("bb") == {"name": "bb", "prefix": "bb"}
+    assert parse_count[0] == first + 1
+
+
+def test_invalidate_forces_reparse(config_path, write_config, parse_count):
+    """文件标识不变时使用缓存，调用 _invalidate_config_cache 后重新解析"""
+    write_config(_config("a"))
+    st = os.stat(config_path)
+    assert utils.find_repo_by_name("a") is not None
+
+    # 大小和修改时间都不变的改写无法被察觉
+    write_config(_config("b"))
+    os.utime(config_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert utils.find_repo_by_name("b") is None
+    parsed = parse_count[0]
+
+    utils._invalidate_config_cache()
+    assert utils.find_repo_by_name("b") is not None
+    assert utils.find_repo_by_name("a") is None
+    assert parse_count[0] == parsed + 1
+
+
+def test_deferred_save(config_path, write_config):
+    """延迟保存时读取内存中的配置，flush_config 后才写入文件"""
+    write_config(_config("a"))
+    utils.save_config(_config("a", "b"), defer=True)
+    assert utils.find_repo_by_name("b") is not None
+    assert "\"b\"" not in config_path.read_text(encoding="utf-8")
+
+    assert utils.flush_config()
+    assert utils._PENDING_CONFIG is None
+    utils._invalidate_config_cache()
+    assert utils.load_config() == _config("a", "b")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="Windows 不使用 POSIX 权限位")
+def test_save_keeps_file_mode(config_path, write_config):
+    """原子写入替换文件后保留原文件的权限"""
+    write_config(_config("a"))
+    os.chmod(config_path, 0o644)
+    assert utils.save_config(_config("a", "b"))
+    assert os.stat(config_path).st_mode & 0o777 == 0o644
@@ -5,7 +5,6 @@ Git命令输出捕获测试脚本 - 使用Rich库
 测试Rich库是否影响Git命令输出的捕获和显示
 """
 
-import os
 import sys
 import subprocess
 import platform
@@ -30,6 +29,27 @@ except ImportError:
 # 创建Rich控制台对象
 console = Console()
 
+# 超过该长度的输出不再做语法高亮/面板截断，避免大量文本经过Pygments词法分析
+MAX_RENDER_SIZE = 8192
+
+def print_highlighted(text: str) -> None:
+    """
+    输出命令结果：较短时使用Rich语法高亮，过长时直接写入标准输出
+    
+    :param text: 要输出的文本
+    """
+    if len(text) < MAX_RENDER_SIZE:
+        console.print(Syntax(text, "bash", theme="monokai", line_numbers=False))
+    else:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+def truncate_for_panel(text: str) -> str:
+    """截断过长的文本，用于在面板中显示"""
+    if len(text) > MAX_RENDER_SIZE:
+        return text[:MAX_RENDER_SIZE] + "\n…(已截断)…"
+    return text
+
 def copy_to_clipboard(text: str) -> bool:
     """
     复制文本到剪贴板
@@ -69,14 +89,12 @@ def test_rich_method1(git_command: List[str]) -> Tuple[bool, str]:
         
         if result.stdout:
             console.print("\n[bold green]标准输出:[/]")
-            # 使用Rich语法高亮显示
-            syntax = Syntax(result.stdout, "bash", theme="monokai", line_numbers=False)
-            console.print(syntax)
+            # 使用Rich语法高亮显示 (输出过长时直接打印)
+            print_highlighted(result.stdout)
             
         if result.stderr:
             console.print("\n[bold red]错误输出:[/]")
-            syntax = Syntax(result.stderr, "bash", theme="monokai", line_numbers=False)
-            console.print(syntax)
+            print_highlighted(result.stderr)
             
         return result.returncode == 0, result.stdout + result.stderr
     except Exception as e:
@@ -92,7 +110,7 @@ def test_rich_method2(git_command: List[str]) -> Tuple[bool, str]:
     cmd_str = " ".join(full_cmd)
     console.print(f"执行命令: [bold cyan]{cmd_str}[/]")
     
-    full_output = ""
+    chunks = []
     process = None
     
     try:
@@ -100,21 +118,21 @@ def test_rich_method2(git_command: List[str]) -> Tuple[bool, str]:
             full_cmd,
             stdout=subprocess.PIPE,
             stderr=subprocess.STDOUT,  # 合并标准输出和错误输出
-            universal_newlines=False,  # 使用字节流
-            bufsize=1  # 行缓冲
+            universal_newlines=False  # 使用字节流
         )
         
         if process.stdout:
             console.print("\n[bold green]命令输出:[/]")
-            with console.status("[bold green]执行中...[/]") as status:
-                for line in iter(process.stdout.readline, b''):
-                    line_str = line.decode('utf-8', errors='replace')
-                    # 使用Rich直接打印
-                    console.print(line_str, end="")
-                    full_output += line_str
+            # 按块读取并原样写到标准输出，不逐行解码、也不经过Rich渲染
+            out = sys.stdout.buffer
+            for chunk in iter(lambda: process.stdout.read1(65536), b''):
+                out.write(chunk)
+                out.flush()
+                chunks.append(chunk)
                 
         return_code = process.wait()
-        return return_code == 0, full_output
+        # 只在结束时解码一次，避免多字节字符被拆开
+        return return_code == 0, b"".join(chunks).decode('utf-8', errors='replace')
     except Exception as e:
         console.print(f"[bold red]执行命令时出错:[/] {str(e)}")
         return False, str(e)
@@ -142,14 +160,14 @@ def test_rich_method3(git_command: List[str]) -> Tuple[bool, str]:
         
         console.print("\n[bold green]命令输出:[/]")
         # 使用Rich面板显示输出
-        panel = Panel(output, title=cmd_str, border_style="green")
+        panel = Panel(truncate_for_panel(output), title=cmd_str, border_style="green")
         console.print(panel)
         
         return True, output
     except subprocess.CalledProcessError as e:
         console.print(f"[bold red]命令执行失败 (返回码: {e.returncode}):[/]")
         if e.output:
-            panel = Panel(e.output, title=f"错误输出", border_style="red")
+            panel = Panel(truncate_for_panel(e.output), title=f"错误输出", border_style="red")
             console.print(panel)
         return False, e.output if e.output else str(e)
     except Exception as e:
@@ -173,34 +191,22 @@ def test_rich_clipboard_copy(git_command: List[str]) -> bool:
 
 def test_rich_batch_file(git_command: List[str]) -> bool:
     """
-    创建临时批处理文件并执行 + Rich（仅Windows）
+    通过cmd执行git命令并暂停窗口 + Rich（仅Windows）
+    直接把参数列表交给cmd，不再生成临时批处理文件
     """
     if platform.system() != "Windows":
         console.print("[bold yellow]此方法仅适用于Windows系统[/]")
         return False
     
-    console.print("\n[bold green]===== 测试临时批处理文件 + Rich =====[/]")
-    
-    # 创建临时批处理文件
-    temp_file = "temp_git_cmd.bat"
-    with open(temp_file, "w") as f:
-        f.write(f"@echo off\n")
-        f.write(f"echo 正在执行Git命令: git {' '.join(git_command)}\n")
-        f.write(f"echo --------------------------------------\n")
-        f.write(f"git {' '.join(git_command)}\n")
-        f.write(f"echo --------------------------------------\n")
-        f.write(f"echo 命令执行完毕\n")
-        f.write(f"pause\n")  # 使窗口停留
-    
-    console.print(f"已创建临时批处理文件: [cyan]{temp_file}[/]")
+    console.print("\n[bold green]===== 测试cmd执行 + Rich =====[/]")
+    console.print(f"正在执行Git命令: [bold cyan]git {' '.join(git_command)}[/]")
+    console.print("--------------------------------------")
     
-    with console.status("[bold green]正在执行批处理文件...[/]") as status:
-        # 使用os.system执行批处理文件
-        os.system(temp_file)
+    # "& pause" 使窗口停留，与原批处理文件中的 pause 效果相同
+    result = subprocess.run(["cmd", "/c", "git", *git_command, "&", "pause"], check=False)
     
-    # 删除临时文件
-    os.remove(temp_file)
-    console.print(f"批处理文件执行完毕，临时文件 [cyan]{temp_file}[/] 已删除")
+    console.print("--------------------------------------")
+    console.print(f"命令执行完毕 (返回码: {result.returncode})")
     return True
 
 def main():
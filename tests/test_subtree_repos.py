@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+子树/仓库配置增删改测试
+"""
+
+import json
+
+import pytest
+
+from subtreesync import utils
+
+
+def _sub(name, **extra):
+    return {"name": name, "prefix": f"libs/{name}", "remote": name, "branch": "main", **extra}
+
+
+@pytest.fixture
+def two_repos(write_config):
+    """两个仓库，当前仓库为 Second"""
+    return write_config({
+        "repositories": [
+            {"name": "First", "path": ".", "is_default": True, "repos": [_sub("a")]},
+            {"name": "Second", "path": ".", "repos": [_sub("a"), _sub("b")]},
+        ],
+        "current_repository": "Second",
+    })
+
+
+def _on_disk(config_path):
+    return json.loads(config_path.read_text(encoding="utf-8"))
+
+
+def _names(config, i):
+    return [r["name"] for r in config["repositories"][i]["repos"]]
+
+
+def test_save_updates_existing_entry(config_path, two_repos):
+    """同名子树就地更新，只影响当前仓库"""
+    assert utils.save_subtree_repo(_sub("a", branch="dev"))
+    config = _on_disk(config_path)
+    assert config["repositories"][1]["repos"][0]["branch"] == "dev"
+    assert _names(config, 1) == ["a", "b"]
+    assert config["repositories"][0]["repos"] == [_sub("a")]
+
+
+def test_save_appends_new_entry(config_path, two_repos):
+    """新的子树追加到当前仓库末尾"""
+    assert utils.save_subtree_repo(_sub("c"))
+    assert _names(_on_disk(config_path), 1) == ["a", "b", "c"]
+    assert utils.find_repo_by_name("c") == _sub("c")
+
+
+def test_delete_existing_entry(config_path, two_repos):
+    assert utils.delete_subtree_repo("a")
+    config = _on_disk(config_path)
+    assert _names(config, 1) == ["b"]
+    assert _names(config, 0) == ["a"]
+    assert utils.find_repo_by_name("a") is None
+
+
+def test_delete_missing_name(config_path, two_repos):
+    """删除不存在的子树返回 False，且不改动文件"""
+    before = config_path.read_bytes()
+    assert not utils.delete_subtree_repo("missing")
+    assert config_path.read_bytes() == before
+
+
+def test_duplicate_names_use_first_entry(config_path, write_config):
+    """名称重复时查找、更新都作用于第一个同名条目，删除会移除全部同名条目"""
+    write_config({
+        "repositories": [
+            {"name": "Main", "path": ".", "repos": [_sub("a", branch="one"), _sub("a", branch="two")]},
+        ],
+        "current_repository": "Main",
+    })
+    assert utils.find_repo_by_name("a")["branch"] == "one"
+
+    assert utils.save_subtree_repo(_sub("a", branch="new"))
+    repos = _on_disk(config_path)["repositories"][0]["repos"]
+    assert [r["branch"] for r in repos] == ["new", "two"]
+    assert utils.find_repo_by_name("a")["branch"] == "new"
+
+    assert utils.delete_subtree_repo("a")
+    assert _on_disk(config_path)["repositories"][0]["repos"] == []
+
+
+def test_stale_current_repository_falls_back_to_default(config_path, write_config):
+    """current_repository 指向不存在的仓库时使用默认仓库"""
+    write_config({
+        "repositories": [
+            {"name": "First", "path": ".", "repos": []},
+            {"name": "Second", "path": ".", "is_default": True, "repos": [_sub("a")]},
+        ],
+        "current_repository": "Gone",
+    })
+    assert utils.get_current_repository()["name"] == "Second"
+    assert utils.find_repo_by_name("a") == _sub("a")
+
+    assert utils.save_subtree_repo(_sub("b"))
+    config = _on_disk(config_path)
+    assert _names(config, 1) == ["a", "b"]
+    assert config["repositories"][0]["repos"] == []
+
+
+def test_no_repository(config_path, write_config):
+    """没有任何仓库时保存/删除子树都失败"""
+    write_config({"repositories": [], "current_repository": None})
+    assert not utils.save_subtree_repo(_sub("a"))
+    assert not utils.delete_subtree_repo("a")
+
+
+def test_add_repository(config_path, write_config):
+    """第一个仓库自动设为默认和当前仓库，同名仓库就地更新"""
+    write_config({"repositories": [], "current_repository": None})
+    assert utils.add_repository({"name": "Main", "path": ".", "repos": []})
+    config = _on_disk(config_path)
+    assert config["current_repository"] == "Main"
+    assert config["repositories"][0]["is_default"] is True
+
+    assert utils.add_repository({"name": "Other", "path": "../other", "repos": []})
+    assert utils.add_repository({"name": "Main", "path": "../main", "repos": [_sub("a")]})
+    config = _on_disk(config_path)
+    assert [r["name"] for r in config["repositories"]] == ["Main", "Other"]
+    assert config["repositories"][0]["path"] == "../main"
+    assert config["current_repository"] == "Main"